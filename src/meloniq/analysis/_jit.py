@@ -0,0 +1,24 @@
+"""
+Analiz çekirdekleri için ortak numba derleme yardımcısı.
+
+numba'nın disk önbelleği (cache=True) derlenmiş kodu kaynak .py dosyasının
+yanına yazar ve dosyayı bulamazsa dekoratör çalışırken hata verir. PyInstaller
+ile dondurulmuş derlemelerde modüller kaynak dosyası olmadan yüklendiğinden
+önbellek orada kapatılır; çekirdekler ilk çağrıda bellekte derlenir.
+"""
+
+import sys
+
+from numba import njit as _numba_njit
+
+# Dondurulmuş (frozen) uygulamada disk önbelleği kullanılamaz
+JIT_CACHE = not getattr(sys, "frozen", False)
+
+
+def njit(**options):
+    """
+    numba.njit dekoratörü; disk önbelleği yalnızca kaynaktan çalışırken açık.
+
+    Kullanım: @njit() veya @njit(fastmath=True)
+    """
+    return _numba_njit(cache=JIT_CACHE, **options)
@@ -13,9 +13,106 @@ Daima kulakla doğrulayın.
 
 import numpy as np
 import librosa
+from functools import cached_property
 from typing import Optional
 
 from ..models.results import ChordResult, ChordSegment
+from ._jit import njit
+
+
+def _build_chord_templates(
+    pitch_classes: list[str],
+    qualities: dict[str, np.ndarray],
+) -> tuple[np.ndarray, list[str]]:
+    """
+    Tüm kökler ve nitelikler için normalize akor şablonları oluştur.
+    
+    Returns:
+        ((N_akor, 12) float32 şablon matrisi, satırlarla hizalı akor isimleri)
+    """
+    names = []
+    rows = []
+    
+    for i, root in enumerate(pitch_classes):
+        for suffix, template in qualities.items():
+            names.append(f"{root}{suffix}")
+            rows.append(np.roll(template, i))
+    
+    # Tüm şablonları normalize et
+    matrix = np.stack(rows)
+    matrix /= np.linalg.norm(matrix, axis=1, keepdims=True)
+    
+    return np.ascontiguousarray(matrix, dtype=np.float32), names
+
+
+def beat_times_to_frames(beat_times, sr: int, hop_length: int) -> np.ndarray:
+    """
+    Vuruş zamanlarını çerçeve indekslerine dönüştür.
+    
+    librosa.time_to_frames ile aynı yuvarlama: önce örneğe, sonra çerçeveye
+    tamsayı bölme. Vuruş çerçevelerini hesaplayan her yer bunu kullanır; böylece
+    çerçeveler diğer özniteliklerden kaymaz.
+    """
+    beat_times = np.asarray(beat_times, dtype=np.float64)
+    return (beat_times * sr).astype(np.int64) // hop_length
+
+
+@njit()
+def _merge_runs(
+    chord_ids: np.ndarray,
+    starts: np.ndarray,
+    ends: np.ndarray,
+    confidences: np.ndarray,
+    min_duration: float,
+) -> tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Ardışık aynı akorları birleştir ve min_duration'dan kısa bölümleri at.
+    
+    Tek geçişte bir yazma işaretçisiyle çalışır; girdiler ve çıktılar paralel
+    dizilerdir (akor, başlangıç, bitiş, güven).
+    """
+    n = len(chord_ids)
+    out_ids = np.empty(n, dtype=chord_ids.dtype)
+    out_starts = np.empty(n, dtype=starts.dtype)
+    out_ends = np.empty(n, dtype=ends.dtype)
+    out_confs = np.empty(n, dtype=confidences.dtype)
+    w = 0
+    
+    if n == 0:
+        return out_ids, out_starts, out_ends, out_confs
+    
+    cur_id = chord_ids[0]
+    cur_start = starts[0]
+    cur_end = ends[0]
+    cur_conf = confidences[0]
+    
+    for i in range(1, n):
+        if chord_ids[i] == cur_id:
+            # Öncekiyle birleştir
+            cur_end = ends[i]
+            cur_conf = min(cur_conf, confidences[i])
+        else:
+            # Mevcut bölümün yeterince uzun olup olmadığını kontrol et
+            if cur_end - cur_start >= min_duration:
+                out_ids[w] = cur_id
+                out_starts[w] = cur_start
+                out_ends[w] = cur_end
+                out_confs[w] = cur_conf
+                w += 1
+            cur_id = chord_ids[i]
+            cur_start = starts[i]
+            cur_end = ends[i]
+            cur_conf = confidences[i]
+    
+    # Son bölümü unutma
+    if cur_end - cur_start >= min_duration:
+        out_ids[w] = cur_id
+        out_starts[w] = cur_start
+        out_ends[w] = cur_end
+        out_confs[w] = cur_conf
+        w += 1
+    
+    return out_ids[:w], out_starts[:w], out_ends[:w], out_confs[:w]
 
 
 class ChordAnalyzer:
@@ -33,45 +130,66 @@ class ChordAnalyzer:
     PITCH_CLASSES = ['C', 'C#', 'D', 'D#', 'E', 'F', 'F#', 'G', 'G#', 'A', 'A#', 'B']
     
     # Majör akor için şablon (kök pozisyon vurgusu)
-    MAJOR_TEMPLATE = np.array([1.0, 0, 0, 0, 0.8, 0, 0, 0.7, 0, 0, 0, 0])
+    MAJOR_TEMPLATE = np.array([1.0, 0, 0, 0, 0.8, 0, 0, 0.7, 0, 0, 0, 0], dtype=np.float32)
     
     # Minör akor için şablon
-    MINOR_TEMPLATE = np.array([1.0, 0, 0, 0.8, 0, 0, 0, 0.7, 0, 0, 0, 0])
+    MINOR_TEMPLATE = np.array([1.0, 0, 0, 0.8, 0, 0, 0, 0.7, 0, 0, 0, 0], dtype=np.float32)
     
-    # Diminished (eksik) akor için şablon
-    DIM_TEMPLATE = np.array([1.0, 0, 0, 0.8, 0, 0, 0.7, 0, 0, 0, 0, 0])
+    # Diminished (eksik) akor için şablon (isteğe bağlı, include_dim=True)
+    DIM_TEMPLATE = np.array([1.0, 0, 0, 0.8, 0, 0, 0.7, 0, 0, 0, 0, 0], dtype=np.float32)
     
-    # Augmented (artık) akor için şablon
-    AUG_TEMPLATE = np.array([1.0, 0, 0, 0, 0.8, 0, 0, 0, 0.7, 0, 0])
+    # Akor şablon kümeleri, içe aktarmada bir kez oluşturulur (sabittir).
+    # Anahtar: eksik (dim) akorların dahil edilip edilmediği
+    _TEMPLATE_SETS = {
+        False: _build_chord_templates(
+            PITCH_CLASSES,
+            {"": MAJOR_TEMPLATE, "m": MINOR_TEMPLATE},
+        ),
+        True: _build_chord_templates(
+            PITCH_CLASSES,
+            {
+                "": MAJOR_TEMPLATE,
+                "m": MINOR_TEMPLATE,
+                "dim": DIM_TEMPLATE,  # Eksik (daha az yaygın, düşük öncelikli)
+            },
+        ),
+    }
     
     # Bir akoru raporlamak için minimum güvenilirlik
     MIN_CONFIDENCE = 0.4
     
-    def __init__(self, hop_length: int = 512):
-        self.hop_length = hop_length
-        
-        # Build all chord templates
-        self.templates = self._build_templates()
+    # Vuruş yokken kullanılan sanal vuruş aralığı (saniye)
+    VIRTUAL_BEAT_SEC = 0.25
     
-    def _build_templates(self) -> dict[str, np.ndarray]:
-        """Tüm kökler ve nitelikler için akor şablonları oluştur."""
-        templates = {}
-        
-        for i, root in enumerate(self.PITCH_CLASSES):
-            # Majör
-            templates[root] = np.roll(self.MAJOR_TEMPLATE, i)
-            
-            # Minör
-            templates[f"{root}m"] = np.roll(self.MINOR_TEMPLATE, i)
-            
-            # Diminished - Eksik (daha az yaygın, düşük öncelikli)
-            templates[f"{root}dim"] = np.roll(self.DIM_TEMPLATE, i)
+    # Bu toplam kroma enerjisinin altındaki sütunlar sessiz kabul edilir
+    SILENCE_THRESHOLD = 1e-6
+    
+    # Desteklenen kromagram yöntemleri
+    CHROMA_METHODS = ("stft", "cqt")
+    
+    def __init__(
+        self,
+        hop_length: int = 512,
+        chroma_method: str = "stft",
+        include_dim: bool = False,
+    ):
+        if chroma_method not in self.CHROMA_METHODS:
+            raise ValueError(
+                f"Unsupported chroma method: {chroma_method}. "
+                f"Supported: {', '.join(self.CHROMA_METHODS)}"
+            )
         
-        # Tüm şablonları normalize et
-        for chord, template in templates.items():
-            templates[chord] = template / np.linalg.norm(template)
+        self.hop_length = hop_length
+        self.chroma_method = chroma_method
+        self.include_dim = include_dim
         
-        return templates
+        # Sınıf düzeyindeki şablonlar (varsayılan: yalnızca majör/minör, 24x12)
+        self.template_matrix, self.template_names = self._TEMPLATE_SETS[include_dim]
+    
+    @cached_property
+    def templates(self) -> dict[str, np.ndarray]:
+        """Akor adı -> normalize şablon eşlemesi (ilk erişimde oluşturulur)."""
+        return dict(zip(self.template_names, self.template_matrix))
     
     def analyze(
         self,
@@ -79,6 +197,8 @@ class ChordAnalyzer:
         sr: int,
         beat_times: Optional[list[float]] = None,
         enabled: bool = True,
+        chroma: Optional[np.ndarray] = None,
+        beat_frames: Optional[np.ndarray] = None,
     ) -> ChordResult:
         """
         Akorları algıla (en iyi çaba).
@@ -88,6 +208,8 @@ class ChordAnalyzer:
             sr: Örnekleme oranı
             beat_times: Vuruş-senkronize analiz için vuruş zamanları
             enabled: Akor algılamanın yapılıp yapılmayacağı
+            chroma: Önceden hesaplanmış (12, n_frames) kromagram (isteğe bağlı)
+            beat_frames: beat_times'a karşılık gelen çerçeve indeksleri (isteğe bağlı)
             
         Returns:
             Akor bölümleri ve sorumluluk reddi içeren ChordResult
@@ -100,23 +222,25 @@ class ChordAnalyzer:
                 needs_confirmation=True,
             )
         
-        duration = len(y) / sr
+        # Kromagram hesapla (verilmemişse)
+        if chroma is None:
+            chroma = self._compute_chroma(y, sr)
+        chroma = chroma.astype(np.float32, copy=False)
         
-        # Kromagram hesapla
-        chroma = librosa.feature.chroma_cqt(
-            y=y,
-            sr=sr,
-            hop_length=self.hop_length,
-        )
-        
-        # Vuruşlar sağlandıysa vuruş-senkronize kroma kullan
         if beat_times and len(beat_times) > 2:
-            segments = self._beat_sync_chords(chroma, sr, beat_times, duration)
+            # Verilmemişse vuruş zamanlarını çerçevelere dönüştür
+            beat_times = np.asarray(beat_times, dtype=np.float64)
+            if beat_frames is None:
+                beat_frames = beat_times_to_frames(beat_times, sr, self.hop_length)
         else:
-            segments = self._windowed_chords(chroma, sr, duration)
+            # Vuruş yoksa sabit aralıklı sanal vuruşlar üret (vuruşsuz yedek)
+            beat_frames = self._virtual_beat_frames(chroma.shape[1], sr)
+            beat_times = beat_frames * self.hop_length / sr
+        
+        runs = self._segment_chroma_and_match(chroma, beat_frames, beat_times)
         
         # Akor dizisini yumuşat
-        segments = self._smooth_chords(segments)
+        segments = self._smooth_chords(*runs)
         
         return ChordResult(
             enabled=True,
@@ -125,135 +249,173 @@ class ChordAnalyzer:
             needs_confirmation=True,
         )
     
-    def _beat_sync_chords(
-        self,
-        chroma: np.ndarray,
-        sr: int,
-        beat_times: list[float],
-        duration: float,
-    ) -> list[ChordSegment]:
-        """Her vuruş için bir akor algıla."""
-        segments = []
+    def _compute_chroma(self, y: np.ndarray, sr: int) -> np.ndarray:
+        """
+        Seçilen yönteme göre kromagram hesapla.
         
-        # Vuruş zamanlarını çerçevelere dönüştür
-        beat_frames = librosa.time_to_frames(
-            beat_times,
+        STFT kroması şablon eşleştirme için yeterlidir ve CQT'den çok daha hızlıdır;
+        CQT isteğe bağlı olarak seçilebilir.
+        """
+        if self.chroma_method == "cqt":
+            return librosa.feature.chroma_cqt(
+                y=y,
+                sr=sr,
+                hop_length=self.hop_length,
+            )
+        
+        return librosa.feature.chroma_stft(
+            y=y,
             sr=sr,
             hop_length=self.hop_length,
+            n_fft=2048,
         )
+    
+    def _virtual_beat_frames(self, n_frames: int, sr: int) -> np.ndarray:
+        """
+        Vuruş bilgisi yokken eşit aralıklı sanal vuruş çerçeveleri üret.
         
-        for i in range(len(beat_frames) - 1):
-            start_frame = beat_frames[i]
-            end_frame = beat_frames[i + 1]
-            
-            if end_frame > start_frame and end_frame <= chroma.shape[1]:
-                # Average chroma in this beat
-                beat_chroma = np.mean(chroma[:, start_frame:end_frame], axis=1)
-                
-                # Find best matching chord
-                chord, confidence = self._match_chord(beat_chroma)
-                
-                if confidence >= self.MIN_CONFIDENCE:
-                    segments.append(ChordSegment(
-                        start=beat_times[i],
-                        end=beat_times[i + 1],
-                        chord=chord,
-                        confidence=round(confidence, 2),
-                    ))
+        Son sınır parçanın sonuna eklenir; böylece son kısa bölüm de eşleştirilir.
+        """
+        hop_frames = max(1, int(self.VIRTUAL_BEAT_SEC * sr / self.hop_length))
+        beat_frames = np.arange(0, n_frames, hop_frames, dtype=np.int64)
+        return np.append(beat_frames, n_frames)
+    
+    def _segment_chroma_and_match(
+        self,
+        chroma: np.ndarray,
+        beat_frames: np.ndarray,
+        beat_times: np.ndarray,
+    ) -> tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Her vuruş aralığı için bir akor algıla.
         
-        return segments
+        Returns:
+            (akor indeksleri, başlangıçlar, bitişler, güvenler) paralel dizileri
+        """
+        # Vuruş başına kroma toplamları (12, N_geçerli) ve çerçeve sayıları
+        beat_sums, widths, valid = self._beat_sum_chroma(chroma, beat_frames)
+        
+        # Tüm vuruşları tek seferde eşleştir
+        chord_idx, confidences = self._match_chords(beat_sums, widths)
+        
+        beat_idx = np.flatnonzero(valid)
+        keep = confidences >= self.MIN_CONFIDENCE
+        beat_idx = beat_idx[keep]
+        
+        return (
+            chord_idx[keep],
+            beat_times[beat_idx],
+            beat_times[beat_idx + 1],
+            np.round(confidences[keep].astype(np.float64), 2),
+        )
     
-    def _windowed_chords(
+    def _beat_sum_chroma(
         self,
         chroma: np.ndarray,
-        sr: int,
-        duration: float,
-    ) -> list[ChordSegment]:
-        """Sabit pencerelerde akorları algıla (vuruşsuz yedek)."""
-        window_sec = 0.5  # 500ms windows
-        hop_sec = 0.25  # 250ms hop
+        beat_frames: np.ndarray,
+    ) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Ardışık vuruş çerçeveleri arasındaki kromayı topla.
         
-        window_frames = int(window_sec * sr / self.hop_length)
-        hop_frames = int(hop_sec * sr / self.hop_length)
+        Vuruş çerçevelerinin artan sırada olduğu varsayılır; tüm vuruşlar
+        tek bir np.add.reduceat geçişiyle toplanır. Kosinüs eşleştirmesi
+        ölçekten bağımsız olduğundan ortalamaya bölmek gerekmez.
         
-        segments = []
-        frame = 0
+        Returns:
+            (geçerli vuruşların (12, N) kroma toplamları, çerçeve sayıları (N,),
+             vuruş başına geçerlilik maskesi)
+        """
+        n_frames = chroma.shape[1]
+        bounds = np.clip(beat_frames, 0, n_frames)
         
-        while frame < chroma.shape[1] - window_frames:
-            # Average chroma in window
-            window_chroma = np.mean(chroma[:, frame:frame + window_frames], axis=1)
-            
-            # Find best matching chord
-            chord, confidence = self._match_chord(window_chroma)
-            
-            start_time = frame * self.hop_length / sr
-            end_time = (frame + window_frames) * self.hop_length / sr
-            
-            if confidence >= self.MIN_CONFIDENCE:
-                segments.append(ChordSegment(
-                    start=round(start_time, 2),
-                    end=round(end_time, 2),
-                    chord=chord,
-                    confidence=round(confidence, 2),
-                ))
-            
-            frame += hop_frames
+        widths = np.diff(bounds).astype(np.float32)
+        valid = (widths > 0) & (beat_frames[1:] <= n_frames)
+        
+        if not valid.any():
+            return np.zeros((chroma.shape[0], 0), dtype=chroma.dtype), widths[valid], valid
+        
+        # Geçerli başlangıçlar kesin artandır; aradaki sıfır genişlikli vuruşlar
+        # toplamı etkilemez. Son geçerli vuruşun sonunda kesilen görünüm
+        # sayesinde son toplam da doğru sınırda biter (kopya yok).
+        starts = bounds[:-1][valid]
+        end = bounds[1:][valid][-1]
+        sums = np.add.reduceat(chroma[:, :end], starts, axis=1)
         
-        return segments
+        return sums, widths[valid], valid
     
-    def _match_chord(self, chroma: np.ndarray) -> tuple[str, float]:
-        """Bir kroma vektörü için en iyi eşleşen akoru bul."""
-        if np.sum(chroma) == 0:
-            return "N.C.", 0.0  # No chord (silence)
+    def _match_chords(
+        self,
+        chroma_mat: np.ndarray,
+        n_frames: np.ndarray,
+    ) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Kroma sütunlarının her biri için en iyi eşleşen akoru bul.
         
-        # Normalize
-        chroma_norm = chroma / np.linalg.norm(chroma)
+        Sütunlar n_frames çerçevenin kroma toplamlarıdır; kosinüs benzerliği
+        sütun ölçeğinden bağımsız olduğundan ortalama alınmaz, n_frames yalnızca
+        sessizlik eşiğini ortalama enerjiye göre uygulamak için kullanılır.
         
-        best_chord = "N.C."
-        best_score = 0.0
+        Returns:
+            (şablon indeksleri, kosinüs benzerlikleri) - her ikisi de (N,)
+        """
+        chroma_mat = chroma_mat.astype(np.float32, copy=False)
+        n_cols = chroma_mat.shape[1]
         
-        for chord, template in self.templates.items():
-            # Cosine similarity
-            score = np.dot(chroma_norm, template)
-            
-            if score > best_score:
-                best_score = score
-                best_chord = chord
+        # Sessiz/düşük enerjili sütunlar eşleştirilmez: 0 güven alırlar ve
+        # MIN_CONFIDENCE filtresiyle "akor yok" olarak düşerler
+        idx = np.zeros(n_cols, dtype=np.int64)
+        confidences = np.zeros(n_cols, dtype=np.float32)
         
-        return best_chord, best_score
+        active = chroma_mat.sum(axis=0) > self.SILENCE_THRESHOLD * n_frames
+        if not active.any():
+            return idx, confidences
+        
+        active_mat = chroma_mat[:, active]
+        
+        # Sütun normları tek geçişte
+        norms = np.sqrt(np.einsum('ij,ij->j', active_mat, active_mat))
+        
+        # (N_akor, N_aktif) ham puan matrisi - tek matris çarpımı.
+        # Sütun başına pozitif ölçekleme argmax'ı değiştirmez, bu yüzden
+        # yalnızca kazanan puanlar normalize edilir.
+        scores = self.template_matrix @ active_mat
+        active_idx = scores.argmax(axis=0)
+        best = scores[active_idx, np.arange(scores.shape[1])]
+        
+        idx[active] = active_idx
+        confidences[active] = best / norms
+        
+        return idx, confidences
     
     def _smooth_chords(
         self,
-        segments: list[ChordSegment],
+        chord_ids: np.ndarray,
+        starts: np.ndarray,
+        ends: np.ndarray,
+        confidences: np.ndarray,
         min_duration: float = 0.3,
     ) -> list[ChordSegment]:
         """
         Ardışık aynı akorları birleştirerek ve çok kısa bölümleri kaldırarak
         akor dizisini yumuşat.
         """
-        if not segments:
-            return segments
-        
-        smoothed = []
-        current = segments[0]
-        
-        for seg in segments[1:]:
-            if seg.chord == current.chord:
-                # Öncekiyle birleştir
-                current = ChordSegment(
-                    start=current.start,
-                    end=seg.end,
-                    chord=current.chord,
-                    confidence=min(current.confidence, seg.confidence),
-                )
-            else:
-                # Mevcut bölümün yeterince uzun olup olmadığını kontrol et
-                if current.end - current.start >= min_duration:
-                    smoothed.append(current)
-                current = seg
-        
-        # Son bölümü unutma
-        if current.end - current.start >= min_duration:
-            smoothed.append(current)
+        chord_ids, starts, ends, confidences = _merge_runs(
+            np.ascontiguousarray(chord_ids, dtype=np.int64),
+            np.ascontiguousarray(starts, dtype=np.float64),
+            np.ascontiguousarray(ends, dtype=np.float64),
+            np.ascontiguousarray(confidences, dtype=np.float64),
+            min_duration,
+        )
         
-        return smoothed
+        # ChordSegment nesneleri yalnızca en sonda oluşturulur
+        return [
+            ChordSegment(
+                start=float(start),
+                end=float(end),
+                chord=self.template_names[chord_id],
+                confidence=float(conf),
+            )
+            for chord_id, start, end, conf in zip(
+                chord_ids.tolist(), starts, ends, confidences
+            )
+        ]
@@ -12,12 +12,58 @@ Algoritma (artırılmış doğruluk):
 Essentia, MIREX değerlendirmeleri ve müzik teorisi araştırmalarına dayanmaktadır.
 """
 
+import hashlib
+from collections import OrderedDict
+
 import numpy as np
 import librosa
 from typing import Optional, Tuple, List
 from enum import Enum
 
 from ..models.results import KeyResult, KeyCandidate, KeySegment
+from ._jit import njit
+
+
+def _build_relative_keys(pitch_classes: List[str]) -> dict:
+    """Tüm 24 ton için relatif majör/minör eşlemesini oluştur."""
+    relative = {}
+    for i, pitch in enumerate(pitch_classes):
+        # Relatif minör 3 yarım ton aşağıdadır (= 9 yukarı)
+        relative[f"{pitch} major"] = f"{pitch_classes[(i + 9) % 12]} minor"
+        # Relatif majör 3 yarım ton yukarıdadır
+        relative[f"{pitch} minor"] = f"{pitch_classes[(i + 3) % 12]} major"
+    return relative
+
+
+@njit()
+def _weighted_chroma(chroma: np.ndarray) -> np.ndarray:
+    """
+    Çerçeveleri enerjilerine göre ağırlıklandırılmış, toplamı 1 olan kroma.
+    
+    Tek geçişte çalışır; (12, n_frames) ara dizi oluşturulmaz.
+    """
+    n_bins, n_frames = chroma.shape
+    frame_energy = np.zeros(n_frames)
+    total_energy = 1e-10
+    
+    for t in range(n_frames):
+        e = 0.0
+        for b in range(n_bins):
+            e += chroma[b, t]
+        frame_energy[t] = e
+        total_energy += e
+    
+    out = np.zeros(n_bins)
+    for t in range(n_frames):
+        w = frame_energy[t] / total_energy
+        for b in range(n_bins):
+            out[b] += chroma[b, t] * w
+    
+    total = out.sum()
+    if total > 0:
+        out /= total
+    
+    return out.astype(np.float32)
 
 
 class KeyProfile(Enum):
@@ -39,6 +85,23 @@ class KeyAnalyzer:
     # Perde sınıfı isimleri
     PITCH_CLASSES = ['C', 'C#', 'D', 'D#', 'E', 'F', 'F#', 'G', 'G#', 'A', 'A#', 'B']
     
+    # Puan sırasıyla hizalı ton isimleri (kök başına majör, minör)
+    _KEY_NAMES = [f"{p} {m}" for p in PITCH_CLASSES for m in ('major', 'minor')]
+    
+    # Ton -> relatif majör/minör
+    _RELATIVE_KEY = _build_relative_keys(PITCH_CLASSES)
+    
+    # _KEY_NAMES sırasında her tonun relatif tonunun indeksi: majör (2i) ->
+    # 9 yarım ton yukarıdaki minör, minör (2i+1) -> 3 yarım ton yukarıdaki majör
+    _RELATIVE_INDEX = np.where(
+        np.arange(24) % 2 == 0,
+        2 * ((np.arange(24) // 2 + 9) % 12) + 1,
+        2 * ((np.arange(24) // 2 + 3) % 12),
+    )
+    
+    # Dolaşım (circulant) indeks tablosu (12, 12): [k, r] = (k - r) mod 12
+    _CIRCULANT_INDEX = (np.arange(12)[:, None] - np.arange(12)[None, :]) % 12
+    
     # Enharmonik eşdeğerler için alternatif isimler
     ENHARMONIC = {
         'C#': 'Db', 'D#': 'Eb', 'F#': 'Gb', 'G#': 'Ab', 'A#': 'Bb'
@@ -48,58 +111,95 @@ class KeyAnalyzer:
     # Bunlar müzik biliş araştırmalarından elde edilen en doğru profillerdir
     
     # Krumhansl-Kessler (1990) - bilişsel deneyler, en yaygın kullanılan
-    KRUMHANSL_MAJOR = np.array([6.35, 2.23, 3.48, 2.33, 4.38, 4.09, 2.52, 5.19, 2.39, 3.66, 2.29, 2.88])
-    KRUMHANSL_MINOR = np.array([6.33, 2.68, 3.52, 5.38, 2.60, 3.53, 2.54, 4.75, 3.98, 2.69, 3.34, 3.17])
+    KRUMHANSL_MAJOR = np.array([6.35, 2.23, 3.48, 2.33, 4.38, 4.09, 2.52, 5.19, 2.39, 3.66, 2.29, 2.88], dtype=np.float32)
+    KRUMHANSL_MINOR = np.array([6.33, 2.68, 3.52, 5.38, 2.60, 3.53, 2.54, 4.75, 3.98, 2.69, 3.34, 3.17], dtype=np.float32)
     
     # Temperley (1999) - klasik müzik derlemi için optimize edilmiş
-    TEMPERLEY_MAJOR = np.array([5.0, 2.0, 3.5, 2.0, 4.5, 4.0, 2.0, 4.5, 2.0, 3.5, 1.5, 4.0])
-    TEMPERLEY_MINOR = np.array([5.0, 2.0, 3.5, 4.5, 2.0, 4.0, 2.0, 4.5, 3.5, 2.0, 1.5, 4.0])
+    TEMPERLEY_MAJOR = np.array([5.0, 2.0, 3.5, 2.0, 4.5, 4.0, 2.0, 4.5, 2.0, 3.5, 1.5, 4.0], dtype=np.float32)
+    TEMPERLEY_MINOR = np.array([5.0, 2.0, 3.5, 4.5, 2.0, 4.0, 2.0, 4.5, 3.5, 2.0, 1.5, 4.0], dtype=np.float32)
     
     # Shaath (2011) - pop/elektronik müzik için optimize edilmiş
-    SHAATH_MAJOR = np.array([6.6, 2.0, 3.5, 2.3, 4.6, 4.0, 2.5, 5.2, 2.4, 3.8, 2.3, 3.4])
-    SHAATH_MINOR = np.array([6.5, 2.8, 3.5, 5.4, 2.7, 3.5, 2.5, 5.2, 4.0, 2.7, 4.3, 3.2])
+    SHAATH_MAJOR = np.array([6.6, 2.0, 3.5, 2.3, 4.6, 4.0, 2.5, 5.2, 2.4, 3.8, 2.3, 3.4], dtype=np.float32)
+    SHAATH_MINOR = np.array([6.5, 2.8, 3.5, 5.4, 2.7, 3.5, 2.5, 5.2, 4.0, 2.7, 4.3, 3.2], dtype=np.float32)
     
     # EDMA (Elektronik Dans Müziği Analizi) - derlem tabanlı
-    EDMM_MAJOR = np.array([7.0, 1.8, 3.2, 1.8, 4.8, 3.8, 2.2, 5.5, 2.0, 3.5, 2.0, 3.0])
-    EDMM_MINOR = np.array([7.0, 2.5, 3.0, 5.8, 2.2, 3.5, 2.2, 5.5, 4.2, 2.5, 4.5, 2.8])
+    EDMM_MAJOR = np.array([7.0, 1.8, 3.2, 1.8, 4.8, 3.8, 2.2, 5.5, 2.0, 3.5, 2.0, 3.0], dtype=np.float32)
+    EDMM_MINOR = np.array([7.0, 2.5, 3.0, 5.8, 2.2, 3.5, 2.2, 5.5, 4.2, 2.5, 4.5, 2.8], dtype=np.float32)
     
     # Eşikler
     HIGH_CONFIDENCE = 0.70
     MEDIUM_CONFIDENCE = 0.55
     LOW_CONFIDENCE = 0.40
     
+    # Paylaşılan CQT: C1'den 7 oktav, oktav başına 36 bin
+    CQT_N_OCTAVES = 7
+    CQT_BINS_PER_OCTAVE = 36
+    
+    # Bas ağırlıklı kroma aralığı: E2 civarından 4 oktav
+    BASS_FMIN = 80.0
+    BASS_N_OCTAVES = 4
+    
+    # Ton analizi için yeterli örnekleme oranı; daha yüksek oranlar önce bu
+    # orana düşürülür (kroma ~5 kHz üstüne ihtiyaç duymaz)
+    ANALYSIS_SR = 22050
+    
+    # HPSS medyan filtre çekirdeği (çerçeve/bin) ve blok uzunluğu (saniye)
+    HPSS_KERNEL = 31
+    HPSS_BLOCK_SEC = 30
+    
+    # Aynı dalga formu için saklanan en fazla sonuç sayısı
+    RESULT_CACHE_SIZE = 8
+    
     def __init__(self, hop_length: int = 512):
         self.hop_length = hop_length
         self._init_profiles()
+        self._result_cache: OrderedDict[tuple, KeyResult] = OrderedDict()
     
     def _init_profiles(self):
         """Tüm ton profillerini başlat ve normalize et."""
+        profile_names = ['krumhansl', 'temperley', 'shaath', 'edmm']
+        
+        # Normalize profiller (P, 12) - satırlar profile_names ile hizalı
+        self._profile_major = np.stack([
+            self._normalize(self.KRUMHANSL_MAJOR),
+            self._normalize(self.TEMPERLEY_MAJOR),
+            self._normalize(self.SHAATH_MAJOR),
+            self._normalize(self.EDMM_MAJOR),
+        ])
+        self._profile_minor = np.stack([
+            self._normalize(self.KRUMHANSL_MINOR),
+            self._normalize(self.TEMPERLEY_MINOR),
+            self._normalize(self.SHAATH_MINOR),
+            self._normalize(self.EDMM_MINOR),
+        ])
+        
+        # Profil ağırlıkları: Krumhansl referans, Shaath modern müzik için iyi
+        self._profile_weights = np.array([1.0, 0.9, 1.1, 0.8], dtype=np.float32)
+        
+        # Ton puanı kromanın ağırlıklı ortalama profille dairesel korelasyonudur;
+        # döndürmeler ve profil ağırlıkları doğrusal olduğundan tümü tek bir
+        # (12, 24) dolaşım matrisine katlanır: sütun 2r+m, r kökünün m modu
+        weights = self._profile_weights / self._profile_weights.sum()
+        key_matrix = np.stack([
+            (weights @ self._profile_major)[self._CIRCULANT_INDEX],
+            (weights @ self._profile_minor)[self._CIRCULANT_INDEX],
+        ], axis=2)
+        self._key_matrix = np.ascontiguousarray(key_matrix.reshape(12, 24))
+        
+        # İsimle erişim için görünüm (diziler kopyalanmaz)
         self.profiles = {
-            'krumhansl': {
-                'major': self._normalize(self.KRUMHANSL_MAJOR),
-                'minor': self._normalize(self.KRUMHANSL_MINOR),
-                'weight': 1.0  # Referans ağırlık
-            },
-            'temperley': {
-                'major': self._normalize(self.TEMPERLEY_MAJOR),
-                'minor': self._normalize(self.TEMPERLEY_MINOR),
-                'weight': 0.9
-            },
-            'shaath': {
-                'major': self._normalize(self.SHAATH_MAJOR),
-                'minor': self._normalize(self.SHAATH_MINOR),
-                'weight': 1.1  # Modern müzik için iyi
-            },
-            'edmm': {
-                'major': self._normalize(self.EDMM_MAJOR),
-                'minor': self._normalize(self.EDMM_MINOR),
-                'weight': 0.8
+            name: {
+                'major': self._profile_major[i],
+                'minor': self._profile_minor[i],
+                'weight': float(self._profile_weights[i]),
             }
+            for i, name in enumerate(profile_names)
         }
     
     def _normalize(self, profile: np.ndarray) -> np.ndarray:
         """Korelasyon için profili sıfır ortalama ve birim varyansa normalize et."""
-        return (profile - np.mean(profile)) / np.std(profile)
+        profile = profile.astype(np.float64)
+        return ((profile - profile.mean()) / profile.std()).astype(np.float32)
     
     def analyze(
         self,
@@ -118,25 +218,79 @@ class KeyAnalyzer:
         Returns:
             Ton, güven, alternatifler ve bölümler içeren KeyResult
         """
-        # Adım 1: Armonik içeriği ayır (davul/perküsyonu kaldırır)
-        y_harmonic = librosa.effects.harmonic(y, margin=4)
+        # Aynı dalga formu daha önce analiz edildiyse önbellekten döndür
+        cache_key = (self._hash_audio(y), sr, detect_modulations)
+        cached = self._result_cache.get(cache_key)
+        if cached is not None:
+            self._result_cache.move_to_end(cache_key)
+            return cached.model_copy(deep=True)
+        
+        result = self._analyze(y, sr, detect_modulations)
+        
+        # Çağıranın sonucu değiştirmesi önbelleği etkilemesin diye kopya sakla
+        self._result_cache[cache_key] = result.model_copy(deep=True)
+        if len(self._result_cache) > self.RESULT_CACHE_SIZE:
+            self._result_cache.popitem(last=False)
+        
+        return result
+    
+    @staticmethod
+    def _hash_audio(y: np.ndarray) -> bytes:
+        """Dalga formunun içerik özeti (dtype ve şekil dahil)."""
+        y = np.ascontiguousarray(y)
+        h = hashlib.blake2b(digest_size=16)
+        h.update(f"{y.dtype.str}{y.shape}".encode())
+        h.update(memoryview(y).cast('B'))
+        return h.digest()
+    
+    def _analyze(
+        self,
+        y: np.ndarray,
+        sr: int,
+        detect_modulations: bool,
+    ) -> KeyResult:
+        """Önbelleksiz ton analizi (bkz. analyze)."""
+        # Yüksek örnekleme oranlarını düşür: HPSS/CQT/STFT maliyeti örnek
+        # sayısıyla doğrusal ölçeklenir
+        if sr > self.ANALYSIS_SR:
+            y = librosa.resample(
+                y, orig_sr=sr, target_sr=self.ANALYSIS_SR, res_type="polyphase"
+            )
+            sr = self.ANALYSIS_SR
+
+        # Adım 1: Armonik içeriği ayır (davul/perküsyonu kaldırır).
+        # Armonik STFT genliği bir kez hesaplanır; akort tahmini ve STFT kroması
+        # onu yeniden hesaplamadan kullanır. Dalga formu yalnızca CQT için gerekir.
+        D = librosa.stft(y, hop_length=self.hop_length)
+        D_harmonic = self._harmonic_stft(D, sr)
+        y_harmonic = librosa.istft(
+            D_harmonic, hop_length=self.hop_length, length=len(y), dtype=y.dtype
+        )
+        mag_harmonic = np.abs(D_harmonic)
+        S_harmonic = mag_harmonic ** 2
 
         # Adım 2: A440'tan akort sapmasını tahmin et
-        tuning = librosa.estimate_tuning(y=y_harmonic, sr=sr)
+        tuning = librosa.estimate_tuning(S=mag_harmonic, sr=sr)
 
         # Adım 3: Vokal tespiti yap
-        vocal_detected, vocal_confidence = self._detect_vocals(y, sr)
+        vocal_detected, vocal_confidence = self._detect_vocals(y, sr, S=np.abs(D))
 
-        # Adım 4: Vokal varlığına göre kroma stratejisi seç
+        # Adım 4: Vokal varlığına göre kroma stratejisi seç.
+        # Tam aralık CQT bir kez hesaplanır; tüm CQT tabanlı kromalar ondan türetilir.
+        C = self._compute_cqt(y_harmonic, sr, tuning)
         if vocal_detected:
             # Vokal varsa: bas ağırlıklı kroma (harmony foundation) + standart kroma
-            bass_chroma = self._extract_bass_weighted_chroma(y_harmonic, sr, tuning)
-            standard_chroma = self._extract_combined_chroma(y_harmonic, sr, tuning)
+            bass_chroma = self._extract_bass_weighted_chroma(y_harmonic, sr, tuning, C=C)
+            standard_chroma = self._extract_combined_chroma(
+                y_harmonic, sr, tuning, S=S_harmonic, C=C
+            )
             # Bas ağırlıklı kromaya öncelik ver (harmonic foundation daha güvenilir)
             chroma = 0.70 * bass_chroma + 0.30 * standard_chroma
         else:
             # Vokal yoksa: standart çoklu kroma yaklaşımı
-            chroma = self._extract_combined_chroma(y_harmonic, sr, tuning)
+            chroma = self._extract_combined_chroma(
+                y_harmonic, sr, tuning, S=S_harmonic, C=C
+            )
 
         # Adım 5: Global kroma profilini al (ağırlıklı ortalama)
         global_chroma = self._get_weighted_chroma(chroma)
@@ -150,7 +304,7 @@ class KeyAnalyzer:
         # Adım 8: Ton bölümlerini/modülasyonlarını algıla
         segments = []
         if detect_modulations:
-            segments = self._detect_modulations(chroma, sr)
+            segments = self._detect_modulations(chroma, sr, global_confidence=confidence)
 
         # Adım 9: Açıklama oluştur
         explanation = self._generate_explanation(global_key, confidence, alternatives)
@@ -166,7 +320,42 @@ class KeyAnalyzer:
             vocal_detected=vocal_detected,
         )
     
-    def _detect_vocals(self, y: np.ndarray, sr: int) -> Tuple[bool, float]:
+    def _harmonic_stft(self, D: np.ndarray, sr: int) -> np.ndarray:
+        """
+        STFT'nin armonik bileşenini HPSS ile blok blok ayır.
+        
+        Medyan filtreler yereldir: zaman ekseninde her blok, çekirdeğin yarısı
+        kadar komşu çerçeveyle genişletilirse sonuç tüm parçaya tek seferde
+        uygulanan HPSS ile birebir aynıdır. Böylece filtre ve maske ara
+        dizileri parça uzunluğundan bağımsız olarak blok boyutuyla sınırlı kalır.
+        """
+        n_frames = D.shape[1]
+        block = max(1, int(self.HPSS_BLOCK_SEC * sr / self.hop_length))
+        
+        if n_frames <= block:
+            return librosa.decompose.hpss(D, kernel_size=self.HPSS_KERNEL, margin=4)[0]
+        
+        pad = self.HPSS_KERNEL // 2
+        D_harmonic = np.empty_like(D)
+        
+        for start in range(0, n_frames, block):
+            end = min(start + block, n_frames)
+            lo = max(0, start - pad)
+            hi = min(n_frames, end + pad)
+            
+            harmonic = librosa.decompose.hpss(
+                D[:, lo:hi], kernel_size=self.HPSS_KERNEL, margin=4
+            )[0]
+            D_harmonic[:, start:end] = harmonic[:, start - lo:end - lo]
+        
+        return D_harmonic
+    
+    def _detect_vocals(
+        self,
+        y: np.ndarray,
+        sr: int,
+        S: Optional[np.ndarray] = None,
+    ) -> Tuple[bool, float]:
         """
         Ses sinyalinde vokal varlığını tespit et.
 
@@ -174,12 +363,15 @@ class KeyAnalyzer:
         - Spectral centroid: >1500 Hz vokal frekans aralığını gösterir
         - Zero-crossing rate: Yüksek ZCR sessiz harfleri/sibilance'ı gösterir
 
+        S verilirse (y'nin hop_length ile hesaplanmış genlik spektrogramı)
+        spektral merkez ek bir STFT yapmadan ondan hesaplanır.
+
         Returns:
             (vocal_detected: bool, confidence: float)
         """
         # Spektral merkezi hesapla (parlaklık göstergesi)
         spectral_centroids = librosa.feature.spectral_centroid(
-            y=y, sr=sr, hop_length=self.hop_length
+            y=y if S is None else None, S=S, sr=sr, hop_length=self.hop_length
         )[0]
 
         # Sıfır geçiş oranını hesapla
@@ -208,11 +400,24 @@ class KeyAnalyzer:
 
         return vocal_detected, round(confidence, 2)
 
+    def _compute_cqt(self, y: np.ndarray, sr: int, tuning: float) -> np.ndarray:
+        """C1'den başlayan tam aralık CQT genlik spektrogramını hesapla."""
+        return np.abs(librosa.cqt(
+            y,
+            sr=sr,
+            hop_length=self.hop_length,
+            fmin=librosa.note_to_hz('C1'),
+            n_bins=self.CQT_N_OCTAVES * self.CQT_BINS_PER_OCTAVE,
+            bins_per_octave=self.CQT_BINS_PER_OCTAVE,
+            tuning=tuning,
+        ))
+
     def _extract_bass_weighted_chroma(
         self,
         y: np.ndarray,
         sr: int,
-        tuning: float
+        tuning: float,
+        C: Optional[np.ndarray] = None,
     ) -> np.ndarray:
         """
         Bas/harmony odaklı kroma özelliklerini çıkar.
@@ -221,18 +426,30 @@ class KeyAnalyzer:
         daha güvenilir ton bilgisi sağlar. Bass notes genellikle tonun kök
         notlarını takip eder.
 
+        Ayrı bir CQT yerine tam aralık CQT'nin BASS_FMIN'den başlayan
+        4 oktavlık alt bantları kullanılır (C verilmezse hesaplanır).
+
         Returns:
             12 x n_frames kroma matrisi (bas frekanslarına ağırlıklı)
         """
+        if C is None:
+            C = self._compute_cqt(y, sr, tuning)
+
+        # BASS_FMIN'e en yakın (üstteki) CQT bini ve onun frekansı
+        bins_per_octave = self.CQT_BINS_PER_OCTAVE
+        fmin_full = librosa.note_to_hz('C1')
+        first_bin = int(np.ceil(bins_per_octave * np.log2(self.BASS_FMIN / fmin_full)))
+        n_bins = self.BASS_N_OCTAVES * bins_per_octave
+
         # Bas ağırlıklı CQT kroma çıkar (80-400 Hz odaklı)
         chroma_bass = librosa.feature.chroma_cqt(
-            y=y,
+            C=C[first_bin:first_bin + n_bins],
             sr=sr,
             hop_length=self.hop_length,
-            tuning=tuning,
             n_chroma=12,
-            n_octaves=4,  # Daha az oktav = bas odaklı
-            fmin=80,  # E2 - bas gitar/bass range başlangıcı
+            n_octaves=self.BASS_N_OCTAVES,  # Daha az oktav = bas odaklı
+            fmin=fmin_full * 2.0 ** (first_bin / bins_per_octave),
+            bins_per_octave=bins_per_octave,
             norm=2,  # L2 normalize
         )
 
@@ -242,7 +459,9 @@ class KeyAnalyzer:
         self,
         y: np.ndarray,
         sr: int,
-        tuning: float
+        tuning: float,
+        S: Optional[np.ndarray] = None,
+        C: Optional[np.ndarray] = None,
     ) -> np.ndarray:
         """
         Birden fazla kroma temsilini çıkar ve birleştir.
@@ -253,30 +472,44 @@ class KeyAnalyzer:
         - STFT kroma (zamansal doğruluk)
 
         En iyi doğruluk için ağırlıklı kombinasyonu döndürür.
+        
+        S verilirse (y'nin hop_length ile hesaplanmış güç spektrogramı) STFT
+        kroması ek bir STFT yapmadan ondan hesaplanır; C verilirse
+        (_compute_cqt çıktısı) CQT yeniden hesaplanmaz.
         """
+        # CQT genlik spektrogramı bir kez hesaplanır (verilmemişse); hem CQT hem
+        # CENS kroması ondan türetilir (CENS aksi halde aynı CQT'yi yeniden hesaplar)
+        if C is None:
+            C = self._compute_cqt(y, sr, tuning)
+        fmin = librosa.note_to_hz('C1')
+        bins_per_octave = self.CQT_BINS_PER_OCTAVE
+
         # CQT tabanlı kroma - armonik içerik için en doğru
         chroma_cqt = librosa.feature.chroma_cqt(
-            y=y,
+            C=C,
             sr=sr,
             hop_length=self.hop_length,
-            tuning=tuning,
             n_chroma=12,
-            n_octaves=7,
-            fmin=librosa.note_to_hz('C1'),
+            n_octaves=self.CQT_N_OCTAVES,
+            fmin=fmin,
+            bins_per_octave=bins_per_octave,
         )
 
         # CENS - Kroma Enerjisi Normalize Edilmiş İstatistikler (gürültü/tınıya dayanıklı)
         chroma_cens = librosa.feature.chroma_cens(
-            y=y,
+            C=C,
             sr=sr,
             hop_length=self.hop_length,
-            tuning=tuning,
             n_chroma=12,
+            n_octaves=self.CQT_N_OCTAVES,
+            fmin=fmin,
+            bins_per_octave=bins_per_octave,
         )
 
         # STFT kroma - iyi zamansal çözünürlük
         chroma_stft = librosa.feature.chroma_stft(
-            y=y,
+            y=y if S is None else None,
+            S=S,
             sr=sr,
             hop_length=self.hop_length,
             tuning=tuning,
@@ -297,184 +530,154 @@ class KeyAnalyzer:
         """
         Daha yüksek sesli/daha kararlı bölümleri vurgulayarak ağırlıklı ortalama kroma al.
         """
-        # Çerçeve enerjilerini hesapla
-        frame_energy = np.sum(chroma, axis=0)
-        
-        # Sıfıra bölünmeyi önle
-        total_energy = np.sum(frame_energy) + 1e-10
-        
-        # Her çerçeveyi enerjisine göre ağırlıklandır
-        weights = frame_energy / total_energy
-        
-        # Ağırlıklı ortalama
-        weighted_chroma = np.sum(chroma * weights, axis=1)
-        
-        # Toplamı 1 olacak şekilde normalize et
-        if np.sum(weighted_chroma) > 0:
-            weighted_chroma = weighted_chroma / np.sum(weighted_chroma)
-        
-        return weighted_chroma
+        return _weighted_chroma(np.ascontiguousarray(chroma))
     
-    def _find_key(self, chroma: np.ndarray) -> Tuple[str, float, dict]:
+    def _find_key(self, chroma: np.ndarray) -> Tuple[str, float, np.ndarray]:
         """
         Çoklu profillerle Krumhansl-Schmuckler algoritmasını kullanarak tonu bul.
         
         Sağlam algılama için tüm profil tiplerinden ağırlıklı oylama kullanır.
+        
+        Returns:
+            (en iyi ton, güven, _KEY_NAMES ile hizalı (24,) puan dizisi)
         """
-        all_scores = {}
-        profile_results = {}
+        scores = self._score_keys(chroma[None, :])[0]
         
-        # Korelasyon için kromayı normalize et
-        chroma_norm = (chroma - np.mean(chroma)) / (np.std(chroma) + 1e-10)
+        # En iyi tonu bul
+        best_idx = int(scores.argmax())
         
-        # Tüm 24 tonu tüm profillere karşı test et
-        for profile_name, profile_data in self.profiles.items():
-            major_profile = profile_data['major']
-            minor_profile = profile_data['minor']
-            weight = profile_data['weight']
-            
-            profile_scores = {}
-            
-            for i, pitch in enumerate(self.PITCH_CLASSES):
-                # Bu kökü test etmek için kromayı döndür
-                rotated = np.roll(chroma_norm, -i)
-                
-                # Majör profili ile Pearson korelasyonu
-                major_corr = np.corrcoef(rotated, major_profile)[0, 1]
-                major_key = f"{pitch} major"
-                profile_scores[major_key] = major_corr
-                
-                # Minör profili ile Pearson korelasyonu
-                minor_corr = np.corrcoef(rotated, minor_profile)[0, 1]
-                minor_key = f"{pitch} minor"
-                profile_scores[minor_key] = minor_corr
-            
-            profile_results[profile_name] = (profile_scores, weight)
+        # Güvenilirliği hesapla
+        confidence = self._calculate_confidence(scores, best_idx)
         
-        # Ağırlıklı oylama ile puanları topla
-        for key in [f"{p} {m}" for p in self.PITCH_CLASSES for m in ['major', 'minor']]:
-            weighted_sum = 0
-            weight_sum = 0
-            
-            for profile_name, (scores, weight) in profile_results.items():
-                if key in scores:
-                    weighted_sum += scores[key] * weight
-                    weight_sum += weight
-            
-            all_scores[key] = weighted_sum / weight_sum if weight_sum > 0 else 0
+        return self._KEY_NAMES[best_idx], confidence, scores
+    
+    def _score_keys(self, chromas: np.ndarray) -> np.ndarray:
+        """
+        Kroma vektörlerini tüm 24 tona karşı toplu olarak puanla.
         
-        # En iyi tonu bul
-        best_key = max(all_scores, key=all_scores.get)
-        best_score = all_scores[best_key]
+        Pearson korelasyonu ölçekten bağımsızdır; kromaların normalize
+        edilmiş olması gerekmez.
         
-        # Güvenilirliği hesapla
-        confidence = self._calculate_confidence(all_scores, best_key, best_score)
+        Args:
+            chromas: (N, 12) kroma vektörleri
+            
+        Returns:
+            (N, 24) profil ağırlıklı korelasyonlar, _KEY_NAMES ile hizalı
+        """
+        # Pearson korelasyonu için kromaları merkezle; profiller zaten sıfır
+        # ortalama ve birim varyanslıdır (normu sqrt(12))
+        chromas = chromas.astype(np.float32, copy=False)
+        centered = chromas - chromas.mean(axis=1, keepdims=True)
+        scale = np.float32(np.sqrt(12)) * (np.linalg.norm(centered, axis=1) + 1e-10)
+        
+        # Tüm kökler x modlar x profiller tek matris çarpımıyla: (N, 24)
+        return (centered @ self._key_matrix) / scale[:, None]
+    
+    def _calculate_confidence(self, scores: np.ndarray, best_idx: int) -> float:
+        """
+        Tek bir puan vektörü için güven puanını hesapla.
         
-        return best_key, confidence, all_scores
+        Args:
+            scores: _KEY_NAMES ile hizalı (24,) ton puanları
+            best_idx: En iyi tonun indeksi
+        """
+        return self._calculate_confidences(scores[None, :], np.array([best_idx]))[0]
     
-    def _calculate_confidence(
-        self, 
-        all_scores: dict, 
-        best_key: str, 
-        best_score: float
-    ) -> float:
+    def _calculate_confidences(
+        self,
+        scores: np.ndarray,
+        best_idx: np.ndarray,
+    ) -> List[float]:
         """
-        Şunlara dayalı güven puanını hesapla:
+        Şunlara dayalı güven puanlarını toplu olarak hesapla:
         1. Mutlak korelasyon gücü
         2. En iyi ve ikinci en iyi arasındaki fark (relatif ton hariç)
         3. Ton sinyalinin tutarlılığı
-        """
-        sorted_keys = sorted(all_scores.items(), key=lambda x: x[1], reverse=True)
         
-        # Relatif majör/minör al
-        relative = self._get_relative_key(best_key)
+        Args:
+            scores: (N, 24) ton puanları, _KEY_NAMES ile hizalı
+            best_idx: (N,) en iyi ton indeksleri
+            
+        Returns:
+            Her satır için 2 basamağa yuvarlanmış güven
+        """
+        scores = scores.astype(np.float64)
+        rows = np.arange(len(scores))
+        best_score = scores[rows, best_idx]
         
-        # İkinci en iyiyi bul (relatif ton değil)
-        second_best_score = 0
-        for key, score in sorted_keys:
-            if key != best_key and key != relative:
-                second_best_score = score
-                break
+        # İkinci en iyiyi bul (en iyi ve relatif ton hariç)
+        others = scores.copy()
+        others[rows, best_idx] = -np.inf
+        others[rows, self._RELATIVE_INDEX[best_idx]] = -np.inf
+        second_best_score = others.max(axis=1)
         
-        # Faktör 1: Mutlak korelasyon (0-1 ölçekli)
+        # Faktör 1: Mutlak korelasyon (0-1 ölçekli), [-1,1] aralığını [0,1]'e eşle
         # Korelasyon > 0.7 çok güçlü, > 0.5 orta
-        abs_factor = max(0, min(1, (best_score + 1) / 2))  # [-1,1] aralığını [0,1]'e eşle
+        abs_factor = np.clip((best_score + 1) / 2, 0, 1)
         
-        # Faktör 2: İkinci en iyiden ayrılma
-        separation = best_score - second_best_score
-        sep_factor = max(0, min(1, separation * 3))  # Uygun şekilde ölçekle
+        # Faktör 2: İkinci en iyiden ayrılma (uygun şekilde ölçekli)
+        sep_factor = np.clip((best_score - second_best_score) * 3, 0, 1)
         
         # Faktör 3: Ortalamadan ne kadar daha iyi
-        avg_score = np.mean(list(all_scores.values()))
-        above_avg = best_score - avg_score
-        avg_factor = max(0, min(1, above_avg * 2))
+        avg_factor = np.clip((best_score - scores.mean(axis=1)) * 2, 0, 1)
         
         # Birleşik güvenilirlik
         confidence = 0.40 * abs_factor + 0.35 * sep_factor + 0.25 * avg_factor
         
         # Makul aralığa ölçekle ve kırp
-        confidence = max(0.20, min(0.95, confidence * 1.3))
+        confidence = np.clip(confidence * 1.3, 0.20, 0.95)
         
-        return round(confidence, 2)
+        return [round(c, 2) for c in confidence.tolist()]
     
     def _get_relative_key(self, key: str) -> str:
         """Bir tonun relatif majör/minörünü al."""
-        parts = key.split()
-        if len(parts) != 2:
-            return ""
-        
-        pitch, mode = parts[0], parts[1]
-        
-        try:
-            pitch_idx = self.PITCH_CLASSES.index(pitch)
-        except ValueError:
-            return ""
-        
-        if mode == "major":
-            # Relatif minör 3 yarım ton aşağıdadır (= 9 yukarı)
-            rel_idx = (pitch_idx + 9) % 12
-            return f"{self.PITCH_CLASSES[rel_idx]} minor"
-        else:
-            # Relatif majör 3 yarım ton yukarıdadır
-            rel_idx = (pitch_idx + 3) % 12
-            return f"{self.PITCH_CLASSES[rel_idx]} major"
+        return self._RELATIVE_KEY.get(key, "")
     
     def _get_alternatives(
         self, 
-        all_scores: dict, 
+        scores: np.ndarray, 
         primary_key: str,
         primary_confidence: float,
     ) -> List[KeyCandidate]:
         """Puana göre sıralanmış alternatif ton adaylarını al."""
-        sorted_keys = sorted(all_scores.items(), key=lambda x: x[1], reverse=True)
+        # En yüksek 6 puan: kısmi seçim + yalnızca bunların sıralanması
+        top_idx = np.argpartition(-scores, 5)[:6]
+        top_idx = top_idx[np.lexsort((top_idx, -scores[top_idx]))]
         
-        alternatives = []
-        primary_score = all_scores.get(primary_key, 0)
+        primary_score = float(scores[self._KEY_NAMES.index(primary_key)])
         
-        for key, score in sorted_keys[:6]:
+        # Adaylar önce (ton, güven) demetleri olarak toplanır
+        candidates = []
+        for idx in top_idx.tolist():
+            key = self._KEY_NAMES[idx]
             if key != primary_key:
+                score = float(scores[idx])
+                
                 # Güveni birincile göre ölçekle
                 if primary_score > 0:
                     rel_conf = (score / primary_score) * primary_confidence
                 else:
                     rel_conf = 0.3
                 
-                conf = max(0.10, min(0.90, rel_conf))
-                
-                alternatives.append(KeyCandidate(
-                    key=key,
-                    confidence=round(conf, 2),
-                ))
+                candidates.append((key, round(max(0.10, min(0.90, rel_conf)), 2)))
         
-        return alternatives[:4]
+        # KeyCandidate nesneleri yalnızca döndürülen ilk 4 aday için oluşturulur
+        return [
+            KeyCandidate(key=key, confidence=conf)
+            for key, conf in candidates[:4]
+        ]
     
     def _detect_modulations(
         self, 
         chroma: np.ndarray, 
         sr: int,
+        global_confidence: Optional[float] = None,
     ) -> List[KeySegment]:
         """
         Pencreli analiz kullanarak parça boyunca ton değişikliklerini algıla.
+        
+        Global ton güveni yüksekse önce örtüşmeyen pencerelerle kaba bir tarama
+        yapılır; tüm pencereler aynı tonda birleşirse ince taramaya gerek kalmaz.
         """
         # Pencreli analiz parametreleri
         window_sec = 8  # 8 saniyelik pencereler
@@ -492,79 +695,141 @@ class KeyAnalyzer:
             key, conf, _ = self._find_key(global_chroma)
             return [KeySegment(start=0.0, end=duration, key=key, confidence=conf)]
         
-        segments = []
+        scan = None
+        if global_confidence is not None and global_confidence >= self.HIGH_CONFIDENCE:
+            # Güçlü tonal merkez: örtüşmeyen pencerelerle kaba tarama
+            scan = self._scan_windows(chroma, window_frames, window_frames)
+            coarse_keys = scan[2]
+            if len(coarse_keys) < 2 or np.any(coarse_keys != coarse_keys[0]):
+                scan = None
+        
+        if scan is None:
+            scan = self._scan_windows(chroma, window_frames, hop_frames)
+        starts, window_scores, best_idx = scan
+        
+        # Bölümler paralel listelerde toplanır (başlangıç, bitiş, ton indeksi, güven)
+        seg_starts, seg_ends, seg_keys, seg_confs = [], [], [], []
         current_key = None
         current_conf = 0
         segment_start = 0.0
         
-        frame = 0
-        while frame < n_frames - window_frames // 2:
-            end_frame = min(frame + window_frames, n_frames)
-            
-            # Pencere kromasını al
-            window_chroma = self._get_weighted_chroma(chroma[:, frame:end_frame])
-            key, conf, _ = self._find_key(window_chroma)
-            
+        window_confs = self._calculate_confidences(window_scores, best_idx)
+        
+        for frame, idx, conf in zip(starts.tolist(), best_idx.tolist(), window_confs):
             time = frame * self.hop_length / sr
             
             if current_key is None:
-                current_key = key
+                current_key = idx
                 current_conf = conf
                 segment_start = 0.0
-            elif key != current_key and conf > self.LOW_CONFIDENCE:
+            elif idx != current_key and conf > self.LOW_CONFIDENCE:
                 # Ton değişimi algılandı
-                segments.append(KeySegment(
-                    start=segment_start,
-                    end=time,
-                    key=current_key,
-                    confidence=round(current_conf, 2),
-                ))
-                current_key = key
+                seg_starts.append(segment_start)
+                seg_ends.append(time)
+                seg_keys.append(current_key)
+                seg_confs.append(round(current_conf, 2))
+                current_key = idx
                 current_conf = conf
                 segment_start = time
             else:
                 # Yumuşatma ile güveni güncelle
                 current_conf = 0.7 * current_conf + 0.3 * conf
-            
-            frame += hop_frames
         
         # Son bölümü ekle
         if current_key is not None:
-            segments.append(KeySegment(
-                start=segment_start,
-                end=duration,
-                key=current_key,
-                confidence=round(current_conf, 2),
-            ))
+            seg_starts.append(segment_start)
+            seg_ends.append(duration)
+            seg_keys.append(current_key)
+            seg_confs.append(round(current_conf, 2))
         
         # Çok kısa bölümleri birleştir (< 6 saniye)
-        return self._merge_short_segments(segments, min_duration=6.0)
+        return self._merge_short_segments(
+            np.array(seg_starts),
+            np.array(seg_ends),
+            np.array(seg_keys, dtype=np.int64),
+            np.array(seg_confs),
+            min_duration=6.0,
+        )
+    
+    def _scan_windows(
+        self,
+        chroma: np.ndarray,
+        window_frames: int,
+        hop_frames: int,
+    ) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Tüm pencereleri tek seferde puanla.
+        
+        Returns:
+            (pencere başlangıç çerçeveleri, (N, 24) puanlar, (N,) en iyi ton indeksleri)
+        """
+        n_frames = chroma.shape[1]
+        starts = np.arange(0, n_frames - window_frames // 2, hop_frames)
+        ends = np.minimum(starts + window_frames, n_frames)
+        window_scores = self._score_keys(self._window_weighted_chroma(chroma, starts, ends))
+        
+        return starts, window_scores, window_scores.argmax(axis=1)
+    
+    def _window_weighted_chroma(
+        self,
+        chroma: np.ndarray,
+        starts: np.ndarray,
+        ends: np.ndarray,
+    ) -> np.ndarray:
+        """
+        Her pencere için enerji ağırlıklı kroma toplamını hesapla.
+        
+        _get_weighted_chroma ile aynı yönü verir, ancak normalize edilmez
+        (ton puanlaması ölçekten bağımsızdır). Örtüşen pencereler kümülatif
+        toplam farkıyla tek geçişte hesaplanır.
+        
+        Returns:
+            (N_pencere, 12) ağırlıklı kroma toplamları
+        """
+        frame_energy = chroma.sum(axis=0)
+        
+        # Uzun parçalarda farkların hassasiyetini korumak için float64 biriktir
+        csum = np.zeros((chroma.shape[1] + 1, chroma.shape[0]))
+        np.cumsum((chroma * frame_energy).T, axis=0, out=csum[1:])
+        
+        return (csum[ends] - csum[starts]).astype(np.float32)
     
     def _merge_short_segments(
         self, 
-        segments: List[KeySegment],
+        starts: np.ndarray,
+        ends: np.ndarray,
+        key_ids: np.ndarray,
+        confidences: np.ndarray,
         min_duration: float = 6.0,
     ) -> List[KeySegment]:
-        """min_duration süresinden kısa bölümleri komşularıyla birleştir."""
-        if len(segments) <= 1:
-            return segments
-        
-        merged = []
-        
-        for seg in segments:
-            if seg.end - seg.start < min_duration and merged:
-                # Önceki bölümü uzat
-                prev = merged[-1]
-                merged[-1] = KeySegment(
-                    start=prev.start,
-                    end=seg.end,
-                    key=prev.key,
-                    confidence=min(prev.confidence, seg.confidence),
-                )
-            else:
-                merged.append(seg)
+        """
+        min_duration süresinden kısa bölümleri bir önceki bölüme kat.
         
-        return merged
+        Bölümler paralel diziler olarak verilir (key_ids, _KEY_NAMES indeksleri);
+        birleştirme tek maske ve reduceat ile yapılır, KeySegment nesneleri
+        yalnızca kalan bölümler için en sonda oluşturulur.
+        """
+        if len(starts) == 0:
+            return []
+        
+        # İlk bölüm her zaman kalır; sonraki kısa bölümler öncekine katılır
+        keep = (ends - starts) >= min_duration
+        keep[0] = True
+        keep_idx = np.flatnonzero(keep)
+        
+        # Her grubun sonu bir sonraki kalan bölümden hemen önceki bölümdür
+        last_idx = np.append(keep_idx[1:] - 1, len(starts) - 1)
+        merged_confs = np.minimum.reduceat(confidences, keep_idx)
+        
+        return [
+            KeySegment(start=start, end=end, key=self._KEY_NAMES[key_id], confidence=conf)
+            for start, end, key_id, conf in zip(
+                starts[keep_idx].tolist(),
+                ends[last_idx].tolist(),
+                key_ids[keep_idx].tolist(),
+                merged_confs.tolist(),
+            )
+        ]
     
     def _generate_explanation(
         self,
@@ -12,6 +12,8 @@ Ses şiddeti ve ses istatistikleri modülü.
 
 import numpy as np
 import librosa
+import scipy.signal
+from functools import lru_cache
 from typing import Optional
 
 try:
@@ -21,6 +23,92 @@ except ImportError:
     PYLOUDNORM_AVAILABLE = False
 
 from ..models.results import AudioStats
+from ._jit import njit
+
+
+@njit(fastmath=True)
+def _max_abs(y: np.ndarray) -> float:
+    """
+    Sinyalin mutlak tepe değeri.
+    
+    8 bağımsız kısmi maksimum tutulur; bağımlılık zinciri kırıldığı için
+    döngü SIMD ile vektörleşir ve np.abs ara dizisi oluşturulmaz.
+    """
+    lanes = np.zeros(8)
+    n = y.shape[0]
+    n_chunked = n - n % 8
+    
+    for i in range(0, n_chunked, 8):
+        for k in range(8):
+            v = abs(y[i + k])
+            if v > lanes[k]:
+                lanes[k] = v
+    
+    peak = 0.0
+    for k in range(8):
+        if lanes[k] > peak:
+            peak = lanes[k]
+    for i in range(n_chunked, n):
+        v = abs(y[i])
+        if v > peak:
+            peak = v
+    
+    return peak
+
+
+@njit(fastmath=True)
+def _downmix_energy_and_peak(y: np.ndarray) -> tuple:
+    """
+    Kanal ortalaması (mono) sinyalin ortalama karesi ve mutlak tepesi.
+    
+    Mono karışım ara dizi olarak oluşturulmaz; her örnek tek geçişte
+    kanallardan toplanır. y (kanal, örnek) şeklindedir.
+    """
+    n_channels, n_samples = y.shape
+    energy = 0.0
+    peak = 0.0
+    
+    for j in range(n_samples):
+        v = 0.0
+        for c in range(n_channels):
+            v += y[c, j]
+        v /= n_channels
+        
+        energy += v * v
+        a = abs(v)
+        if a > peak:
+            peak = a
+    
+    return energy / max(n_samples, 1), peak
+
+
+@lru_cache(maxsize=8)
+def _kweighting_sos(sr: int) -> np.ndarray:
+    """
+    ITU-R BS.1770 K-ağırlıklandırma filtresinin (raf + RLB yüksek geçiren)
+    ikinci dereceden bölümleri; örnekleme oranı başına bir kez tasarlanır.
+    """
+    stages = (
+        pyln.IIRfilter(4.0, 1 / np.sqrt(2), 1500.0, sr, 'high_shelf'),
+        pyln.IIRfilter(0.0, 0.5, 38.0, sr, 'high_pass'),
+    )
+    return np.array([np.concatenate(stage.generate_coefficients()) for stage in stages])
+
+
+@lru_cache(maxsize=32)
+def _gating_block_bounds(
+    n_blocks: int,
+    sr: int,
+    block_sec: float,
+    step_sec: float,
+) -> tuple[np.ndarray, np.ndarray]:
+    """Kapılama bloklarının örnek sınırları (pyloudnorm ile aynı yuvarlama)."""
+    steps = np.arange(n_blocks) * step_sec / block_sec
+    lower = (block_sec * steps * sr).astype(int)
+    upper = (block_sec * (steps + 1) * sr).astype(int)
+    lower.flags.writeable = False
+    upper.flags.writeable = False
+    return lower, upper
 
 
 class LoudnessAnalyzer:
@@ -34,6 +122,16 @@ class LoudnessAnalyzer:
     - Parça nerede en parlak/karanlık?
     """
     
+    # ITU-R BS.1770 kapılama parametreleri
+    LUFS_BLOCK_SEC = 0.4
+    LUFS_BLOCK_STEP_SEC = 0.1
+    ABSOLUTE_GATE = -70.0
+    RELATIVE_GATE = -10.0
+    CHANNEL_GAINS = np.array([1.0, 1.0, 1.0, 1.41, 1.41])
+    
+    # Spektral öznitelikler için STFT boyutu
+    N_FFT = 2048
+    
     def __init__(self, hop_length: int = 512):
         self.hop_length = hop_length
     
@@ -42,6 +140,7 @@ class LoudnessAnalyzer:
         y: np.ndarray, 
         sr: int,
         estimate_tuning: bool = True,
+        S: Optional[np.ndarray] = None,
     ) -> AudioStats:
         """
         Ses şiddetini ve ses istatistiklerini analiz et.
@@ -50,10 +149,16 @@ class LoudnessAnalyzer:
             y: Ses örnekleri (mono veya stereo olabilir)
             sr: Örnekleme oranı
             estimate_tuning: Akort referansının tahmin edilip edilmeyeceği
+            S: İlk kanalın önceden hesaplanmış STFT genliği
+               (n_fft=2048, hop_length=self.hop_length); parlaklık ve akort
+               tahmini bunu paylaşır
             
         Returns:
             Ses şiddeti, tepeler, dinamikler ve eğriler içeren AudioStats
         """
+        # Tüm geçişler float32 üzerinde (float64 girdi bellek trafiğini ikiye katlar)
+        y = np.asarray(y, dtype=np.float32)
+        
         # Ses şiddeti analizi için uygun şekli sağla
         y_for_lufs = self._prepare_for_lufs(y)
         
@@ -66,8 +171,13 @@ class LoudnessAnalyzer:
         # Dinamik aralık
         dynamic_range = self._measure_dynamic_range(y, sr)
         
+        # Parlaklık ve akort için tek STFT genliği
+        y_first = y if y.ndim == 1 else y[0]
+        if S is None:
+            S = self.stft_magnitude(y_first)
+        
         # Parlaklık eğrisi
-        brightness_curve = self._compute_brightness(y if y.ndim == 1 else y[0], sr)
+        brightness_curve = self._compute_brightness(S, sr)
         
         # Ses şiddeti eğrisi
         loudness_curve = self._compute_loudness_curve(y_for_lufs, sr)
@@ -76,9 +186,7 @@ class LoudnessAnalyzer:
         tuning_ref = 440.0
         tuning_deviation = 0.0
         if estimate_tuning:
-            tuning_ref, tuning_deviation = self._estimate_tuning(
-                y if y.ndim == 1 else y[0], sr
-            )
+            tuning_ref, tuning_deviation = self._estimate_tuning(S, sr)
         
         return AudioStats(
             lufs_integrated=round(lufs_integrated, 1),
@@ -91,6 +199,10 @@ class LoudnessAnalyzer:
             tuning_deviation_cents=round(tuning_deviation, 1),
         )
     
+    def stft_magnitude(self, y: np.ndarray) -> np.ndarray:
+        """Parlaklık ve akort tahmininin kullandığı STFT genliği."""
+        return np.abs(librosa.stft(y, n_fft=self.N_FFT, hop_length=self.hop_length))
+    
     def _prepare_for_lufs(self, y: np.ndarray) -> np.ndarray:
         """LUFS ölçümü için sesi hazırla (stereo için 2D gerekli)."""
         if y.ndim == 1:
@@ -109,47 +221,131 @@ class LoudnessAnalyzer:
         y: np.ndarray, 
         sr: int,
     ) -> tuple[float, float]:
-        """Entegre ve kısa dönem LUFS ölç."""
+        """
+        Entegre ve kısa dönem LUFS ölç.
+        
+        K-ağırlıklandırma filtresi sinyale bir kez uygulanır; 400ms blokların
+        ortalama kareleri kümülatif toplamdan okunur ve hem entegre değer hem
+        de 3 saniyelik kısa dönem pencereleri aynı ITU-R BS.1770 kapılamasıyla
+        (mutlak -70 LUFS, göreli -10 LU) vektörel olarak hesaplanır.
+        """
         if not PYLOUDNORM_AVAILABLE:
             return self._fallback_lufs(y, sr)
         
         try:
-            # pyloudnorm stereo için (samples, channels) bekler
-            if y.ndim == 2:
-                y_pyln = y.T if y.shape[0] <= 2 else y
-            else:
-                y_pyln = y
+            # (kanal, örnek) düzeni
+            if y.ndim == 1:
+                y = y.reshape(1, -1)
             
-            meter = pyln.Meter(sr)
+            n_samples = y.shape[1]
+            block_size = self.LUFS_BLOCK_SEC * sr
+            if y.shape[0] > len(self.CHANNEL_GAINS) or n_samples < block_size:
+                return self._fallback_lufs(y, sr)
             
-            # Entegre ses şiddeti
-            integrated = meter.integrated_loudness(y_pyln)
+            # K-ağırlıklı sinyalin kümülatif kare toplamları (kanal başına); filtre
+            # çıktısı yerinde karelenip toplanır, sinyal boyunda tek dizi kalır
+            cumulative = self._kweight(y, sr)
+            np.square(cumulative, out=cumulative)
+            np.cumsum(cumulative, axis=1, out=cumulative)
             
-            # Kısa dönem ses şiddeti (3 saniyelik pencereler)
-            # Pencereli ölçümlerin maksimumunu hesaplayacağız
-            window_size = int(3 * sr)
-            hop_size = int(0.5 * sr)
+            gains = self.CHANNEL_GAINS[:y.shape[0]]
             
-            samples = y_pyln if y_pyln.ndim == 1 else y_pyln[:, 0]
-            n_samples = len(samples)
+            # Entegre ses şiddeti: tüm sinyal üzerindeki bloklar
+            n_blocks = int(np.round((n_samples / sr - self.LUFS_BLOCK_SEC) / self.LUFS_BLOCK_STEP_SEC)) + 1
+            lower, upper = self._block_bounds(n_blocks, sr)
+            block_ms = self._block_mean_square(cumulative, lower, upper, block_size)
+            integrated = float(self._gated_loudness(block_ms, gains))
             
-            short_term_values = []
-            for start in range(0, n_samples - window_size, hop_size):
-                window = y_pyln[start:start + window_size] if y_pyln.ndim == 1 else y_pyln[start:start + window_size, :]
-                try:
-                    st_lufs = meter.integrated_loudness(window)
-                    if not np.isinf(st_lufs) and not np.isnan(st_lufs):
-                        short_term_values.append(st_lufs)
-                except Exception:
-                    pass
+            # Kısa dönem ses şiddeti (0.5 saniye aralıklı 3 saniyelik pencereler)
+            window_size = int(3 * sr)
+            hop_size = int(0.5 * sr)
+            starts = np.arange(0, n_samples - window_size, hop_size)
             
-            short_term_max = max(short_term_values) if short_term_values else integrated
+            short_term_max = integrated
+            if len(starts) > 0:
+                n_window_blocks = int(np.round((window_size / sr - self.LUFS_BLOCK_SEC) / self.LUFS_BLOCK_STEP_SEC)) + 1
+                lower, upper = self._block_bounds(n_window_blocks, sr)
+                window_ms = self._block_mean_square(
+                    cumulative,
+                    starts[:, None] + lower,
+                    np.minimum(starts[:, None] + upper, starts[:, None] + window_size),
+                    block_size,
+                )
+                short_term = self._gated_loudness(window_ms, gains)
+                short_term = short_term[np.isfinite(short_term)]
+                if short_term.size:
+                    short_term_max = float(short_term.max())
             
             return integrated, short_term_max
             
         except Exception:
             return self._fallback_lufs(y, sr)
     
+    def _kweight(self, y: np.ndarray, sr: int) -> np.ndarray:
+        """K-ağırlıklandırma filtresini tek geçişte uygula."""
+        return scipy.signal.sosfilt(_kweighting_sos(sr), y, axis=-1)
+    
+    def _block_bounds(self, n_blocks: int, sr: int) -> tuple[np.ndarray, np.ndarray]:
+        """Kapılama bloklarının örnek sınırları (örnekleme oranı başına önbellekte)."""
+        return _gating_block_bounds(n_blocks, sr, self.LUFS_BLOCK_SEC, self.LUFS_BLOCK_STEP_SEC)
+    
+    def _block_mean_square(
+        self,
+        cumulative: np.ndarray,
+        lower: np.ndarray,
+        upper: np.ndarray,
+        block_size: float,
+    ) -> np.ndarray:
+        """
+        Kümülatif kare toplamından blok ortalama karelerini oku; (..., blok, kanal) döndürür.
+        
+        cumulative kapsayıcıdır (cumulative[:, k] = ilk k+1 örneğin toplamı);
+        [lower, upper) aralığının toplamı iki önek toplamının farkıdır.
+        """
+        upper = np.minimum(upper, cumulative.shape[1])
+        
+        def prefix(idx: np.ndarray) -> np.ndarray:
+            return np.where(idx > 0, cumulative[:, np.maximum(idx - 1, 0)], 0.0)
+        
+        sums = prefix(upper) - prefix(lower)
+        return np.moveaxis(sums, 0, -1) / block_size
+    
+    def _gated_loudness(self, block_ms: np.ndarray, gains: np.ndarray) -> np.ndarray:
+        """
+        Blok ortalama karelerinden kapılanmış ses şiddetini hesapla.
+        
+        block_ms (..., blok, kanal) şeklindedir; son iki eksen boyunca
+        ITU-R BS.1770 mutlak ve göreli kapılaması uygulanır.
+        """
+        with np.errstate(divide='ignore', invalid='ignore'):
+            block_loudness = -0.691 + 10.0 * np.log10(block_ms @ gains)
+            
+            above_absolute = block_loudness >= self.ABSOLUTE_GATE
+            relative_gate = self._weighted_loudness(block_ms, above_absolute, gains) + self.RELATIVE_GATE
+            
+            gated = (
+                (block_loudness > relative_gate[..., None])
+                & (block_loudness > self.ABSOLUTE_GATE)
+            )
+            return self._weighted_loudness(block_ms, gated, gains, empty=0.0)
+    
+    def _weighted_loudness(
+        self,
+        block_ms: np.ndarray,
+        mask: np.ndarray,
+        gains: np.ndarray,
+        empty: float = np.nan,
+    ) -> np.ndarray:
+        """Maskelenmiş blokların kanal ortalamalarından ses şiddeti (boş maske için `empty`)."""
+        counts = mask.sum(axis=-1)
+        channel_sums = np.einsum('...bc,...b->...c', block_ms, mask)
+        channel_means = np.where(
+            counts[..., None] > 0,
+            channel_sums / np.maximum(counts, 1)[..., None],
+            empty,
+        )
+        return -0.691 + 10.0 * np.log10(channel_means @ gains)
+    
     def _fallback_lufs(
         self, 
         y: np.ndarray, 
@@ -162,7 +358,7 @@ class LoudnessAnalyzer:
         else:
             y_mono = y
         
-        rms = np.sqrt(np.mean(y_mono ** 2))
+        rms = np.sqrt(np.einsum('i,i->', y_mono, y_mono) / len(y_mono))
         
         # RMS'den yaklaşık LUFS (çok kaba)
         # LUFS ≈ 20 * log10(rms) - 0.691 (K-ağırlıklandırma yaklaşımı)
@@ -175,11 +371,8 @@ class LoudnessAnalyzer:
     
     def _measure_peak(self, y: np.ndarray) -> float:
         """dBFS cinsinden gerçek tepe seviyesini ölç."""
-        # Maksimum mutlak örnek değerini bul
-        if y.ndim == 2:
-            peak = np.max(np.abs(y))
-        else:
-            peak = np.max(np.abs(y))
+        # Maksimum mutlak örnek değerini bul (kanallar tek bir düz dizide)
+        peak = _max_abs(np.ravel(y))
         
         # Convert to dBFS
         if peak > 0:
@@ -200,16 +393,9 @@ class LoudnessAnalyzer:
         Tepe faktörü = Tepe / RMS
         Yüksek değerler = daha dinamik, düşük = daha sıkıştırılmış.
         """
-        if y.ndim == 2:
-            y_mono = np.mean(y, axis=0)
-        else:
-            y_mono = y
-        
-        # RMS
-        rms = np.sqrt(np.mean(y_mono ** 2))
-        
-        # Peak
-        peak = np.max(np.abs(y_mono))
+        # RMS ve tepe, mono karışım üzerinde tek geçişte
+        mean_square, peak = _downmix_energy_and_peak(y if y.ndim == 2 else y.reshape(1, -1))
+        rms = np.sqrt(mean_square)
         
         # Crest factor in dB
         if rms > 0:
@@ -221,7 +407,7 @@ class LoudnessAnalyzer:
     
     def _compute_brightness(
         self, 
-        y: np.ndarray, 
+        S: np.ndarray, 
         sr: int,
     ) -> list[tuple[float, float]]:
         """
@@ -230,32 +416,24 @@ class LoudnessAnalyzer:
         (zaman, parlaklık) demetlerinin listesini döndürür.
         Parlaklık 0-1 aralığına normalize edilir.
         """
-        # Spectral centroid
-        centroid = librosa.feature.spectral_centroid(
-            y=y, 
-            sr=sr, 
-            hop_length=self.hop_length,
-        )[0]
-        
-        # Times
-        times = librosa.frames_to_time(
-            np.arange(len(centroid)),
-            sr=sr,
-            hop_length=self.hop_length,
-        )
+        # Çıktı için örneklemeyi azalt (her ~0.5 saniyede bir)
+        hop_output = max(1, int(0.5 * sr / self.hop_length))
+        frames = np.arange(0, S.shape[1], hop_output)
+        times = librosa.frames_to_time(frames, sr=sr, hop_length=self.hop_length)
+        
+        # Spektral ağırlık merkezi: genlik ağırlıklı ortalama frekans, yalnızca
+        # çıktı çerçeveleri için tek matris-vektör çarpımıyla (sessiz çerçeve 0 Hz)
+        S_out = S[:, frames]
+        freqs = np.fft.rfftfreq(2 * (S.shape[0] - 1), 1.0 / sr).astype(S.dtype)
+        centroid = (freqs @ S_out) / (S_out.sum(axis=0) + 1e-10)
         
         # Parlaklığı normalize et (tipik merkez aralığı: 500-8000 Hz)
         centroid_normalized = np.clip((centroid - 500) / 7500, 0, 1)
         
-        # Çıktı için örneklemeyi azalt (her ~0.5 saniyede bir)
-        hop_output = max(1, int(0.5 * sr / self.hop_length))
-        
-        curve = [
-            (round(float(times[i]), 2), round(float(centroid_normalized[i]), 3))
-            for i in range(0, len(times), hop_output)
+        return [
+            (round(time, 2), round(value, 3))
+            for time, value in zip(times.tolist(), centroid_normalized.tolist())
         ]
-        
-        return curve
     
     def _compute_loudness_curve(
         self, 
@@ -276,26 +454,27 @@ class LoudnessAnalyzer:
         window_size = int(0.4 * sr)  # 400ms pencereler (kısa dönem)
         hop_size = int(0.1 * sr)  # 100ms hop
         
-        curve = []
+        n_frames = len(range(0, len(y_mono) - window_size, hop_size))
+        if n_frames == 0:
+            return []
         
-        for start in range(0, len(y_mono) - window_size, hop_size):
-            window = y_mono[start:start + window_size]
-            rms = np.sqrt(np.mean(window ** 2))
-            
-            if rms > 0:
-                # Approximate LUFS
-                loudness = 20 * np.log10(rms) - 0.691
-            else:
-                loudness = -70.0
-            
-            time = start / sr
-            curve.append((round(time, 2), round(loudness, 1)))
+        # Tüm pencereler tek bir kopyasız görünümde; enerji tek geçişte
+        frames = np.lib.stride_tricks.sliding_window_view(y_mono, window_size)[::hop_size][:n_frames]
+        energy = np.einsum('ij,ij->i', frames, frames) / window_size
+        
+        # Yaklaşık LUFS (sessiz pencereler -70)
+        with np.errstate(divide='ignore'):
+            loudness = np.where(energy > 0, 10 * np.log10(energy) - 0.691, -70.0)
+        times = np.arange(n_frames) * hop_size / sr
         
-        return curve
+        return [
+            (round(time, 2), round(value, 1))
+            for time, value in zip(times.tolist(), loudness.tolist())
+        ]
     
     def _estimate_tuning(
         self, 
-        y: np.ndarray, 
+        S: np.ndarray, 
         sr: int,
     ) -> tuple[float, float]:
         """
@@ -307,43 +486,28 @@ class LoudnessAnalyzer:
         try:
             # Perde tahmini için librosa'nın piptrack fonksiyonunu kullan
             pitches, magnitudes = librosa.piptrack(
-                y=y, 
+                S=S, 
                 sr=sr,
                 hop_length=self.hop_length,
                 threshold=0.1,
             )
             
-            # En belirgin perdeleri al
-            prominent_pitches = []
+            # En belirgin perdeleri al: her çerçevenin en güçlü bin'indeki perde
+            strongest = magnitudes.argmax(axis=0)
+            frame_pitches = pitches[strongest, np.arange(pitches.shape[1])]
+            prominent_pitches = frame_pitches[frame_pitches > 0]
             
-            for t in range(pitches.shape[1]):
-                index = magnitudes[:, t].argmax()
-                pitch = pitches[index, t]
-                
-                if pitch > 0:
-                    prominent_pitches.append(pitch)
-            
-            if not prominent_pitches:
+            if prominent_pitches.size == 0:
                 return 440.0, 0.0
             
-            # A notalarına yakın perdeleri bul (440Hz'in oktavları)
-            a_freqs = [440 * (2 ** octave) for octave in range(-4, 5)]
-            
-            deviations = []
-            for pitch in prominent_pitches:
-                for a_freq in a_freqs:
-                    # Perdenin bir A notasına yakın olup olmadığını kontrol et
-                    ratio = pitch / a_freq
-                    cents = 1200 * np.log2(ratio)
-                    
-                    if abs(cents) < 50:  # Bir A'nın 50 sent içinde
-                        deviations.append(cents)
-            
-            if not deviations:
-                return 440.0, 0.0
+            # Her perdenin A440'a göre eşit tamperaman ızgarasından sapması:
+            # sent farkı 100'lük modda [-50, 50) aralığına katlanır, böylece
+            # yalnızca A'lar değil tüm notalar akort tahminine katkı verir
+            cents_from_a = 1200.0 * np.log2(prominent_pitches / 440.0)
+            deviations = np.mod(cents_from_a + 50.0, 100.0) - 50.0
             
             # Medyan sapma
-            median_deviation = np.median(deviations)
+            median_deviation = float(np.median(deviations))
             
             # Gerçek A4 frekansını hesapla
             a4_estimated = 440.0 * (2 ** (median_deviation / 1200))
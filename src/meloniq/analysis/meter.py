@@ -17,6 +17,50 @@ import librosa
 from typing import Optional, List, Tuple
 
 from ..models.results import MeterResult
+from ._jit import njit
+
+
+@njit()
+def _gather_beat_strengths(
+    onset_env: np.ndarray,
+    pulse: np.ndarray,
+    beat_times: np.ndarray,
+    frame_rate: float,
+) -> np.ndarray:
+    """
+    Her vuruşun en yakın çerçevesi çevresinde (±1 çerçeve) başlangıç zarfı
+    maksimumu ile nabız ortalamasının toplamı.
+    
+    Çerçeve zamanları düzgün aralıklı (i * hop / sr) olduğundan en yakın
+    çerçeve doğrudan t * frame_rate yuvarlanarak bulunur.
+    """
+    n_frames = onset_env.shape[0]
+    strengths = np.zeros(beat_times.shape[0])
+    
+    for i in range(beat_times.shape[0]):
+        # En yakın çerçeve (eşitlikte önceki çerçeve, np.argmin gibi)
+        idx = int(np.ceil(beat_times[i] * frame_rate - 0.5))
+        idx = min(max(idx, 0), n_frames - 1)
+        
+        start_idx = max(0, idx - 1)
+        end_idx = min(n_frames, idx + 2)
+        if end_idx <= start_idx:
+            continue
+        
+        onset_val = onset_env[start_idx]
+        for k in range(start_idx + 1, end_idx):
+            if onset_env[k] > onset_val:
+                onset_val = onset_env[k]
+        
+        pulse_val = 0.0
+        if pulse.shape[0] > idx:
+            for k in range(start_idx, end_idx):
+                pulse_val += pulse[k]
+            pulse_val /= end_idx - start_idx
+        
+        strengths[i] = onset_val + pulse_val
+    
+    return strengths
 
 
 class MeterAnalyzer:
@@ -51,50 +95,43 @@ class MeterAnalyzer:
     def __init__(self, hop_length: int = 512):
         self.hop_length = hop_length
     
+    @staticmethod
+    def _autocorr_fft(x: np.ndarray) -> np.ndarray:
+        """
+        Negatif olmayan gecikmeler için normalize otokorelasyon (FFT ile, O(N log N)).
+        
+        np.correlate(x, x, 'full') sonucunun ikinci yarısına eşittir; ac[0] > 0
+        ise ac[0]'a bölünür.
+        """
+        n = len(x)
+        n_fft = 1 << int(np.ceil(np.log2(max(2 * n - 1, 1))))
+        spectrum = np.fft.rfft(x, n_fft)
+        autocorr = np.fft.irfft(spectrum * np.conj(spectrum), n_fft)[:n]
+        
+        if autocorr[0] > 0:
+            autocorr = autocorr / autocorr[0]
+        
+        return autocorr
+    
     def _compute_beat_strengths(
         self, 
-        y: np.ndarray, 
-        sr: int, 
+        onset_env: np.ndarray, 
+        pulse: np.ndarray, 
         beat_times: List[float],
+        sr: int,
     ) -> np.ndarray:
         """
         Birden fazla özellik kullanarak her vuruştaki gücü hesapla.
-        """
-        strengths = []
         
-        # Başlangıç (onset) güç zarfını al
-        onset_env = librosa.onset.onset_strength(
-            y=y, sr=sr, hop_length=self.hop_length
+        Başlangıç zarfı ve PLP nabzı analyze() içinde bir kez hesaplanıp
+        buraya verilir.
+        """
+        strengths = _gather_beat_strengths(
+            onset_env,
+            pulse,
+            np.asarray(beat_times, dtype=np.float64),
+            sr / self.hop_length,
         )
-        times = librosa.times_like(onset_env, sr=sr, hop_length=self.hop_length)
-        
-        # Mevcutsa daha iyi vuruş gücü tahmini için PLP (Baskın Yerel Nabız) kullan
-        try:
-            pulse = librosa.beat.plp(onset_envelope=onset_env, sr=sr, hop_length=self.hop_length)
-        except:
-            pulse = onset_env
-            
-        for t in beat_times:
-            # En yakın çerçeveyi bul
-            idx = np.argmin(np.abs(times - t))
-            
-            # Başlangıç zarfından ve nabızdan güç al (küçük pencere ile)
-            start_idx = max(0, idx - 1)
-            end_idx = min(len(onset_env), idx + 2)
-            
-            if end_idx > start_idx:
-                # Başlangıç gücü ve nabız gücünü birleştir
-                onset_val = np.max(onset_env[start_idx:end_idx])
-                if hasattr(pulse, '__len__') and len(pulse) > idx:
-                    pulse_val = np.mean(pulse[start_idx:end_idx])
-                else:
-                    pulse_val = 0
-                
-                strengths.append(onset_val + pulse_val)
-            else:
-                strengths.append(0.0)
-        
-        strengths = np.array(strengths)
         
         # Normalize et
         if np.max(strengths) > 0:
@@ -119,12 +156,8 @@ class MeterAnalyzer:
         if max_lag < 2:
              return {m: 0.5 for m, _, _ in self.METERS}
              
-        autocorr = np.correlate(beat_strengths, beat_strengths, mode='full')
-        autocorr = autocorr[len(autocorr)//2:]
-        
-        # Normalize et
-        if autocorr[0] > 0:
-            autocorr = autocorr / autocorr[0]
+        # Normalize otokorelasyon
+        autocorr = self._autocorr_fft(beat_strengths)
             
         for meter_str, beats_per_bar, _ in self.METERS:
             # beats_per_bar'da periyodikliği kontrol et
@@ -149,20 +182,53 @@ class MeterAnalyzer:
         sr: int,
         tempo: Optional[float] = None,
         beat_times: Optional[List[float]] = None,
+        onset_env: Optional[np.ndarray] = None,
+        chroma: Optional[np.ndarray] = None,
     ) -> MeterResult:
-        """Sesi ölçü için analiz et."""
+        """
+        Sesi ölçü için analiz et.
+        
+        Args:
+            y: Ses örnekleri (mono)
+            sr: Örnekleme oranı
+            tempo: Vuruş takibi için isteğe bağlı tempo ipucu
+            beat_times: Önceden hesaplanmış vuruş zamanları
+            onset_env: Önceden hesaplanmış başlangıç güç zarfı (aynı hop_length ile)
+            chroma: Armonik ritim için önceden hesaplanmış CQT kromagramı
+        """
+        
+        # Tüm öznitelikler float32 üzerinde hesaplanır
+        y = np.asarray(y, dtype=np.float32)
+        
+        # Log-mel spektrogram bir kez hesaplanır; başlangıç zarfı (ortalama) ve
+        # vuruş takibi zarfı (medyan, beat_track varsayılanı) aynı spektrogramdan
+        # türetilir
+        mel_db = None
+        if onset_env is None or beat_times is None:
+            mel_db = librosa.power_to_db(
+                librosa.feature.melspectrogram(y=y, sr=sr, hop_length=self.hop_length)
+            )
+        
+        # Vuruş gücü, desen ve periyodiklik yöntemlerinin hepsi aynı zarfı kullanır
+        if onset_env is None:
+            onset_env = librosa.onset.onset_strength(
+                S=mel_db, sr=sr, hop_length=self.hop_length
+            )
         
         # Vuruş zamanlarını al (verilmemişse)
         if beat_times is None:
+            beat_env = librosa.onset.onset_strength(
+                S=mel_db, sr=sr, hop_length=self.hop_length, aggregate=np.median
+            )
             if tempo is not None:
                 _, beat_frames = librosa.beat.beat_track(
-                    y=y, sr=sr, 
+                    onset_envelope=beat_env, sr=sr, 
                     hop_length=self.hop_length,
                     bpm=tempo
                 )
             else:
                 _, beat_frames = librosa.beat.beat_track(
-                    y=y, sr=sr, 
+                    onset_envelope=beat_env, sr=sr, 
                     hop_length=self.hop_length
                 )
             beat_times = librosa.frames_to_time(
@@ -172,21 +238,24 @@ class MeterAnalyzer:
         if len(beat_times) < 12:
             return self._fallback_result("Yetersiz beat sayısı")
         
+        # Mevcutsa daha iyi vuruş gücü tahmini için PLP (Baskın Yerel Nabız) kullan
+        try:
+            pulse = librosa.beat.plp(onset_envelope=onset_env, sr=sr, hop_length=self.hop_length)
+        except Exception:
+            pulse = onset_env
+        
         # Yöntem 1: Geliştirilmiş PLP ile vuruş gücü deseni analizi
-        beat_strengths = self._compute_beat_strengths(y, sr, beat_times)
+        beat_strengths = self._compute_beat_strengths(onset_env, pulse, beat_times, sr)
         strength_scores = self._analyze_strength_patterns(beat_strengths)
         
         # Yöntem 2: Başlangıç (onset) tabanlı güçlü vuruş algılama
-        onset_env = librosa.onset.onset_strength(
-            y=y, sr=sr, hop_length=self.hop_length
-        )
         onset_scores = self._analyze_onset_patterns(onset_env, sr, beat_times)
         
         # Yöntem 3: Spektral akı periyodikliği
         periodicity_scores = self._analyze_periodicity(onset_env, sr)
         
         # Yöntem 4: Armonik Ritim (Akor değişim deseni) -> Ölçü için ÇOK DOĞRU
-        harmonic_scores = self._analyze_harmonic_rhythm(y, sr, beat_times)
+        harmonic_scores = self._analyze_harmonic_rhythm(y, sr, beat_times, chroma=chroma)
         
         # Puanları birleştir - YAYGIN ÖLÇÜLERE (4/4, 3/4) ÖNCELİK VER
         combined_scores = {}
@@ -265,6 +334,7 @@ class MeterAnalyzer:
         y: np.ndarray,
         sr: int,
         beat_times: List[float],
+        chroma: Optional[np.ndarray] = None,
     ) -> dict:
         """
         Armonik Ritmi Analiz Et: Akorlar ne sıklıkla değişiyor?
@@ -277,7 +347,8 @@ class MeterAnalyzer:
         try:
             # 1. Kroma Özelliklerini Hesapla (Armonik içerik)
             # Düşük frekanslarda daha iyi perde çözünürlüğü için CQT kullan
-            chroma = librosa.feature.chroma_cqt(y=y, sr=sr, hop_length=self.hop_length)
+            if chroma is None:
+                chroma = librosa.feature.chroma_cqt(y=y, sr=sr, hop_length=self.hop_length)
             
             # 2. Kromayı Vuruşlara Senkronize Et
             # Bu bize vuruş başına bir kroma vektörü verir
@@ -288,16 +359,21 @@ class MeterAnalyzer:
             if len(beat_frames) < 4:
                  return {m: 0.5 for m, _, _ in self.METERS}
 
-            beat_chroma = librosa.util.sync(chroma, beat_frames, aggregate=np.median)
+            beat_chroma = self._beat_sync_median(chroma, beat_frames)
             
             # 3. Armonik Değişimi Hesapla (HCDF)
             # Ardışık vuruş vektörleri arasındaki Öklid mesafesi
             # Yüksek değer = Akor Değişimi / Düşük değer = Sürdürme
-            beat_chroma = librosa.util.normalize(beat_chroma, axis=0)
+            # Sütunları maksimumlarına böl (librosa.util.normalize varsayılanı,
+            # norm=inf); çok küçük normlu sütunlar olduğu gibi bırakılır
+            norms = np.max(np.abs(beat_chroma), axis=0)
+            norms[norms < np.finfo(beat_chroma.dtype).tiny] = 1.0
+            beat_chroma /= norms
             
             # Bitişik sütunlar arasındaki 1 - kosinüs benzerliğini hesapla
-            # normalize edilmişse dist = 1 - nokta_çarpımına eşdeğerdir
-            cosine_sim = np.sum(beat_chroma[:, :-1] * beat_chroma[:, 1:], axis=0)
+            # normalize edilmişse dist = 1 - nokta_çarpımına eşdeğerdir;
+            # çarpım ve toplam tek einsum geçişinde, ara dizi oluşturulmadan
+            cosine_sim = np.einsum('ij,ij->j', beat_chroma[:, :-1], beat_chroma[:, 1:])
             hcdf = 1 - cosine_sim
             
             # 4. Değişimlerin Periyodikliğini Analiz Et
@@ -305,12 +381,8 @@ class MeterAnalyzer:
             if len(hcdf) < 6:
                 return {m: 0.5 for m, _, _ in self.METERS}
                 
-            autocorr = np.correlate(hcdf, hcdf, mode='full')
-            autocorr = autocorr[len(autocorr)//2:]
-            
-            # Normalize et
-            if autocorr[0] > 0:
-                autocorr = autocorr / autocorr[0]
+            # Normalize otokorelasyon
+            autocorr = self._autocorr_fft(hcdf)
             
             for meter_str, beats_per_bar, _ in self.METERS:
                 if beats_per_bar < len(autocorr):
@@ -333,6 +405,30 @@ class MeterAnalyzer:
              
         return scores
 
+    def _beat_sync_median(
+        self,
+        chroma: np.ndarray,
+        beat_frames: List[int],
+    ) -> np.ndarray:
+        """
+        librosa.util.sync(chroma, beat_frames, aggregate=np.median) ile aynı sonuç.
+        
+        Segmentler genişliklerine göre gruplanır; aynı genişlikteki tüm
+        segmentlerin medyanı tek bir np.median çağrısıyla alınır. Vuruşlar
+        düzenli olduğundan farklı genişlik sayısı azdır.
+        """
+        bounds = librosa.util.fix_frames(beat_frames, x_min=0, x_max=chroma.shape[1])
+        starts = bounds[:-1]
+        widths = np.diff(bounds)
+        
+        beat_chroma = np.empty((chroma.shape[0], len(starts)), dtype=chroma.dtype)
+        for width in np.unique(widths):
+            segments = np.flatnonzero(widths == width)
+            frames = starts[segments, None] + np.arange(width)
+            beat_chroma[:, segments] = np.median(chroma[:, frames], axis=-1)
+        
+        return beat_chroma
+    
     def _analyze_onset_patterns(
         self, 
         onset_env: np.ndarray, 
@@ -353,31 +449,20 @@ class MeterAnalyzer:
         intervals = np.diff(beat_times)
         mean_interval = np.mean(intervals)
         
-        for meter_str, beats_per_bar, _ in self.METERS:
-            # Beklenen bar süresi
-            bar_duration = mean_interval * beats_per_bar
-            
-            # Bar periyodunda otokorelasyonu analiz et
-            lag_samples = int(bar_duration * sr / self.hop_length)
-            
-            if lag_samples <= 0 or lag_samples >= len(onset_env) // 2:
-                scores[meter_str] = 0.5
-                continue
-            
-            # Otokorelasyonu hesapla
-            autocorr = np.correlate(onset_env, onset_env, mode='full')
-            autocorr = autocorr[len(autocorr) // 2:]
-            
-            # Normalize et
-            if autocorr[0] > 0:
-                autocorr = autocorr / autocorr[0]
-            
-            # Bu ölçünün bar periyodundaki korelasyonunu al
-            if lag_samples < len(autocorr):
-                meter_corr = autocorr[lag_samples]
-                scores[meter_str] = max(0, (meter_corr + 1) / 2)  # 0-1 aralığına eşle
-            else:
-                scores[meter_str] = 0.5
+        # Otokorelasyon tüm ölçüler için bir kez hesaplanır
+        autocorr = self._autocorr_fft(onset_env)
+        
+        # Tüm ölçülerin bar periyotları (çerçeve cinsinden gecikme) tek dizide
+        beats_per_bar = np.array([b for _, b, _ in self.METERS])
+        lags = (mean_interval * beats_per_bar * sr / self.hop_length).astype(int)
+        
+        # Geçersiz gecikmeler (çok kısa / zarfın yarısından uzun) nötr 0.5 alır
+        valid = (lags > 0) & (lags < len(onset_env) // 2)
+        meter_corr = autocorr[np.where(valid, lags, 0)]
+        meter_scores = np.where(valid, np.maximum(0, (meter_corr + 1) / 2), 0.5)  # 0-1 aralığına eşle
+        
+        for (meter_str, _, _), score in zip(self.METERS, meter_scores):
+            scores[meter_str] = score
         
         return scores
     
@@ -419,23 +504,22 @@ class MeterAnalyzer:
             else:
                 main_tempo = 120  # varsayılan
             
-            # Her ölçü için, beklenen periyodikliklerin mevcut olup olmadığını kontrol et
-            for meter_str, beats_per_bar, _ in self.METERS:
-                # Beklenen bar temposu
-                bar_tempo = main_tempo / beats_per_bar
-                
-                # Bar periyodunda enerji olup olmadığını kontrol et
-                bar_idx = np.argmin(np.abs(tempo_axis - bar_tempo))
-                
-                # Ayrıca bileşik ölçüler için yarım barı kontrol et
-                half_bar_idx = np.argmin(np.abs(tempo_axis - bar_tempo * 2))
-                
-                # Bu periyotlardaki göreceli güce göre puanla
-                max_val = np.max(avg_tempogram) + 1e-10
-                bar_strength = avg_tempogram[bar_idx] / max_val
-                half_bar_strength = avg_tempogram[half_bar_idx] / max_val if half_bar_idx < len(avg_tempogram) else 0
-                
-                scores[meter_str] = 0.6 * bar_strength + 0.4 * half_bar_strength
+            # Her ölçü için beklenen bar temposu ve (bileşik ölçüler için) yarım
+            # bar temposu; tüm ölçülerin en yakın tempo bin'leri tek adımda bulunur
+            beats_per_bar = np.array([b for _, b, _ in self.METERS])
+            bar_tempos = main_tempo / beats_per_bar
+            targets = np.concatenate([bar_tempos, 2 * bar_tempos])
+            target_idx = np.argmin(np.abs(tempo_axis[None, :] - targets[:, None]), axis=1)
+            
+            # Bu periyotlardaki göreceli güce göre puanla
+            max_val = np.max(avg_tempogram) + 1e-10
+            strengths = avg_tempogram[target_idx] / max_val
+            bar_strength = strengths[:len(self.METERS)]
+            half_bar_strength = strengths[len(self.METERS):]
+            
+            meter_scores = 0.6 * bar_strength + 0.4 * half_bar_strength
+            for (meter_str, _, _), score in zip(self.METERS, meter_scores):
+                scores[meter_str] = score
                 
         except Exception:
             # Tempogram başarısız olursa geri çekil
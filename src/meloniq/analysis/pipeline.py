@@ -8,23 +8,67 @@ Tüm analizcileri yöneten ana analiz boru hattı (pipeline).
 - Bireysel analizcilere erişim
 """
 
+import os
 import time
 import json
+import gzip
+import pickle
 import hashlib
 from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, Future, as_completed
 from typing import Optional, Callable
+from collections import OrderedDict
 from dataclasses import dataclass
 
 import numpy as np
+import librosa
+
+try:
+    import xxhash
+    XXHASH_AVAILABLE = True
+except ImportError:
+    XXHASH_AVAILABLE = False
+
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+try:
+    from threadpoolctl import threadpool_limits
+    THREADPOOLCTL_AVAILABLE = True
+except ImportError:
+    THREADPOOLCTL_AVAILABLE = False
 
 from ..audio_io.loader import AudioLoader, AudioData
-from ..models.results import AnalysisResult, TrackInfo
+from ..models.results import AnalysisResult, TrackInfo, ChordResult
 from .tempo import TempoAnalyzer
 from .key import KeyAnalyzer
 from .meter import MeterAnalyzer
 from .structure import StructureAnalyzer
 from .loudness import LoudnessAnalyzer
-from .chords import ChordAnalyzer
+from .chords import ChordAnalyzer, beat_times_to_frames
+
+
+def _warmup():
+    """
+    librosa'nın tembel alt modül içe aktarımlarını ve filtre bankası önbelleklerini
+    küçük bir sessiz sinyalle tetikle; ilk analizin soğuk başlangıç maliyeti
+    süreç açılışına taşınır.
+    """
+    try:
+        y = np.zeros(22050, dtype=np.float32)
+        librosa.feature.chroma_cqt(y=y, sr=22050)
+        librosa.feature.mfcc(y=y, sr=22050)
+        librosa.onset.onset_strength(y=y, sr=22050)
+    except Exception:
+        pass  # Isınma hatası kritik değil
+
+
+# MELONIQ_WARMUP=1 ile içe aktarma sırasında ısınma yapılır (ör. GUI açılışında)
+if os.environ.get("MELONIQ_WARMUP") == "1":
+    _warmup()
 
 
 @dataclass
@@ -45,6 +89,144 @@ class AnalysisOptions:
     # Performans
     use_cache: bool = True
     cache_dir: Optional[Path] = None
+    # Disk önbelleği varsayılan olarak sıkıştırılmış JSON'dur (yalnızca veri).
+    # True yapılırsa daha hızlı pickle kullanılır; pickle.load rastgele kod
+    # çalıştırabildiğinden yalnızca güvenilen önbellek dizinlerinde açılmalıdır
+    pickle_cache: bool = False
+
+
+class FeatureCache:
+    """
+    Tek bir analiz çalıştırması boyunca analizciler arasında paylaşılan öznitelikler.
+    
+    Öznitelikler (isim, id(y), sr, hop_length) anahtarıyla saklanır; böylece aynı
+    dalga formu için kromagram, başlangıç zarfı vb. yalnızca bir kez hesaplanır.
+    Anahtarlanan diziler önbellek yaşadığı sürece referansla tutulur, bu yüzden
+    id() yeniden kullanımı bir çakışmaya yol açmaz.
+    """
+    
+    def __init__(self, hop_length: int = 512):
+        self.hop_length = hop_length
+        self._features: dict[tuple, np.ndarray] = {}
+        self._arrays: dict[int, np.ndarray] = {}
+    
+    def get(
+        self,
+        name: str,
+        y: np.ndarray,
+        sr: int,
+        compute: Callable[[], np.ndarray],
+    ) -> np.ndarray:
+        """Önbellekteki özniteliği döndür; yoksa compute() ile hesapla ve sakla."""
+        key = (name, id(y), sr, self.hop_length)
+        
+        if key not in self._features:
+            self._arrays[id(y)] = y
+            self._features[key] = compute()
+        
+        return self._features[key]
+    
+    def stft_power(self, y: np.ndarray, sr: int) -> np.ndarray:
+        """
+        STFT güç spektrogramı (n_fft=2048); STFT tabanlı öznitelikler bunu paylaşır.
+        
+        |D|² doğrudan re² + im² olarak hesaplanır; genlik için karekök alınıp
+        yeniden karesi alınmaz.
+        """
+        def compute() -> np.ndarray:
+            D = librosa.stft(y, n_fft=2048, hop_length=self.hop_length)
+            power = np.square(D.real)
+            power += np.square(D.imag)
+            return power
+        
+        return self.get("stft_power", y, sr, compute)
+    
+    def stft_magnitude(self, y: np.ndarray, sr: int) -> np.ndarray:
+        """STFT genliği; yalnızca genlik isteyen öznitelikler için güçten türetilir."""
+        return self.get(
+            "stft_magnitude", y, sr,
+            lambda: np.sqrt(self.stft_power(y, sr)),
+        )
+    
+    def chroma(self, y: np.ndarray, sr: int, method: str = "cqt") -> np.ndarray:
+        """Varsayılan parametrelerle kromagram (CQT veya STFT)."""
+        if method == "stft":
+            return self.get(
+                "chroma_stft", y, sr,
+                lambda: librosa.feature.chroma_stft(
+                    S=self.stft_power(y, sr), sr=sr, hop_length=self.hop_length,
+                ),
+            )
+        
+        return self.get(
+            "chroma_cqt", y, sr,
+            lambda: librosa.feature.chroma_cqt(y=y, sr=sr, hop_length=self.hop_length),
+        )
+    
+    def mel_db(self, y: np.ndarray, sr: int) -> np.ndarray:
+        """Log-mel spektrogram (dB, 128 bant); başlangıç zarfı ve MFCC bunu paylaşır."""
+        return self.get(
+            "mel_db", y, sr,
+            lambda: librosa.power_to_db(
+                librosa.feature.melspectrogram(S=self.stft_power(y, sr), sr=sr)
+            ),
+        )
+    
+    def onset_envelope(self, y: np.ndarray, sr: int) -> np.ndarray:
+        """Başlangıç (onset) güç zarfı (paylaşılan STFT'nin log-mel farkından)."""
+        return self.get(
+            "onset_env", y, sr,
+            lambda: librosa.onset.onset_strength(
+                S=self.mel_db(y, sr),
+                sr=sr,
+                hop_length=self.hop_length,
+            ),
+        )
+    
+    def mfcc(self, y: np.ndarray, sr: int, n_mfcc: int = 13) -> np.ndarray:
+        """Paylaşılan log-mel spektrogramdan MFCC."""
+        return self.get(
+            f"mfcc_{n_mfcc}", y, sr,
+            lambda: librosa.feature.mfcc(S=self.mel_db(y, sr), sr=sr, n_mfcc=n_mfcc),
+        )
+    
+    def beat_frames(self, y: np.ndarray, sr: int, beat_times: list[float]) -> np.ndarray:
+        """Vuruş zamanlarının çerçeve indeksleri (zaman -> çerçeve dönüşümü bir kez)."""
+        return self.get(
+            "beat_frames", y, sr,
+            lambda: beat_times_to_frames(beat_times, sr, self.hop_length),
+        )
+    
+    def clear(self):
+        """Tüm önbelleğe alınmış öznitelikleri bırak."""
+        self._features.clear()
+        self._arrays.clear()
+
+
+# Toplu analizde her işçi sürecinin kendi boru hattı örneği
+_worker_pipeline: Optional["AnalysisPipeline"] = None
+
+
+def _init_batch_worker(options: AnalysisOptions):
+    """
+    İşçi sürecinde boru hattını bir kez oluştur.
+    
+    Paralellik süreç düzeyindedir; işçi içindeki analizci iş parçacığı
+    havuzları ve BLAS/OpenMP iş parçacıkları tek iş parçacığına indirilir,
+    aksi halde süreç sayısı × iş parçacığı sayısı çekirdekleri aşar.
+    """
+    global _worker_pipeline
+    if THREADPOOLCTL_AVAILABLE:
+        threadpool_limits(limits=1)
+    
+    _worker_pipeline = AnalysisPipeline(options)
+    _worker_pipeline.MAX_WORKERS = 1
+    _worker_pipeline.tempo_analyzer.MAX_WORKERS = 1
+
+
+def _analyze_in_worker(path: Path) -> AnalysisResult:
+    """İşçi sürecinde tek bir dosyayı analiz et."""
+    return _worker_pipeline.analyze(path)
 
 
 class AnalysisPipeline:
@@ -55,6 +237,31 @@ class AnalysisPipeline:
     İlerleme geri aramalarını ve önbelleklemeyi destekler.
     """
     
+    # Önbellek anahtarı için dosyanın başından ve sonundan okunan bayt sayısı
+    CACHE_KEY_SAMPLE_BYTES = 64 * 1024
+    
+    # Pickle önbellek biçimi; sonuç modelleri değişince artırılır (eski girdiler geçersizleşir)
+    CACHE_FORMAT_VERSION = 1
+    
+    # Aynı aşama içinde ilerleme geri aramaları arasındaki en kısa süre (saniye)
+    PROGRESS_INTERVAL = 0.05
+    
+    # Bu süreden (saniye) kısa kliplerde akor analizi yapılmaz
+    MIN_CHORD_DURATION = 10.0
+    
+    # Tempo sonrası bağımsız analizler için iş parçacığı sayısı
+    MAX_WORKERS = 4
+    
+    # Toplu analizde varsayılan en fazla işçi süreci sayısı; her işçi kendi
+    # analizcilerini (ve varsa DeepRhythm modelini) belleğe yükler
+    BATCH_MAX_WORKERS = 4
+    
+    # Bellekte tutulan en fazla çözülmüş ses dosyası sayısı
+    AUDIO_CACHE_SIZE = 2
+    
+    # Bellekte tutulan en fazla analiz sonucu sayısı (disk önbelleğinin önünde)
+    RESULT_CACHE_SIZE = 32
+    
     def __init__(self, options: Optional[AnalysisOptions] = None):
         self.options = options or AnalysisOptions()
         
@@ -69,6 +276,12 @@ class AnalysisPipeline:
         # Ses yükleyici (analiz için - 22050 Hz mono)
         self.loader = AudioLoader(target_sr=22050)
         
+        # (çözümlenmiş yol, boyut, mtime_ns) -> yüklenmiş ses
+        self._audio_cache: OrderedDict[tuple, AudioData] = OrderedDict()
+        
+        # (yol, boyut, mtime_ns) -> analiz sonucunun dökümü; aynı oturumda diske gitmeden döner
+        self._result_cache: OrderedDict[tuple, dict] = OrderedDict()
+        
         # Önbellek dizini
         if self.options.cache_dir:
             self.cache_dir = self.options.cache_dir
@@ -96,8 +309,24 @@ class AnalysisPipeline:
         path = Path(path)
         start_time = time.time()
         
+        # Geri arama kısıtlanır: aşama değişimleri ve başlangıç/bitiş her zaman,
+        # aynı aşama içindeki güncellemeler en fazla PROGRESS_INTERVAL'da bir iletilir
+        last_stage = None
+        last_time = 0.0
+        
         def update_progress(stage: str, progress: float):
-            if progress_callback:
+            nonlocal last_stage, last_time
+            if not progress_callback:
+                return
+            
+            now = time.monotonic()
+            if (
+                stage != last_stage
+                or progress in (0.0, 1.0)
+                or now - last_time > self.PROGRESS_INTERVAL
+            ):
+                last_stage = stage
+                last_time = now
                 progress_callback(stage, progress)
         
         # Önbelleği kontrol et
@@ -109,10 +338,13 @@ class AnalysisPipeline:
         
         # Sesi yükle
         update_progress("Loading audio", 0.0)
-        audio = self.loader.load(path, mono=True)
+        audio = self._load_audio(path)
         y = audio.samples_mono
         sr = audio.sample_rate
         
+        # Bu çalıştırma için paylaşılan öznitelikler
+        features = FeatureCache()
+        
         update_progress("Loading audio", 1.0)
         
         # Parça bilgisi
@@ -136,50 +368,101 @@ class AnalysisPipeline:
         
         update_progress("Analyzing tempo", 0.25)
         
-        # Ton analizi
-        update_progress("Analyzing key", 0.3)
-        key_result = self.key_analyzer.analyze(
-            y, sr,
-            detect_modulations=self.options.detect_key_changes,
-        )
-        update_progress("Analyzing key", 0.45)
+        # Vuruş bilgisinden sonra kalan analizler birbirinden bağımsızdır ve
+        # zamanlarının çoğunu GIL'i bırakan yerel kodda (numpy/scipy/numba) geçirir;
+        # bu yüzden iş parçacıklarında eşzamanlı çalıştırılırlar. Paylaşılan
+        # öznitelikler gönderim sırasında ana iş parçacığında (bir kez) hesaplanır,
+        # böylece FeatureCache yalnızca tek iş parçacığından kullanılır.
+        update_progress("Running analyzers", 0.3)
         
-        # Ölçü analizi
-        update_progress("Analyzing meter", 0.5)
-        meter_result = self.meter_analyzer.analyze(y, sr, beat_times=beat_times)
+        with ThreadPoolExecutor(max_workers=self.MAX_WORKERS) as executor:
+            stages: dict[Future, str] = {}
+            
+            # Ton analizi
+            key_future = executor.submit(
+                self.key_analyzer.analyze,
+                y, sr,
+                detect_modulations=self.options.detect_key_changes,
+            )
+            stages[key_future] = "Analyzing key"
+            
+            # Ölçü analizi
+            meter_future = executor.submit(
+                self.meter_analyzer.analyze,
+                y, sr,
+                beat_times=beat_times,
+                onset_env=features.onset_envelope(y, sr),
+                chroma=features.chroma(y, sr),
+            )
+            stages[meter_future] = "Analyzing meter"
+            
+            # Yapı analizi (kısa parçada öznitelik hesaplamadan tek bölüm döner)
+            structure_future = None
+            if audio.duration < self.structure_analyzer.MIN_DURATION:
+                structure_result = self.structure_analyzer.analyze(y, sr)
+            else:
+                structure_future = executor.submit(
+                    self.structure_analyzer.analyze,
+                    y, sr,
+                    beat_times=beat_times,
+                    chroma=features.chroma(y, sr),
+                    mfcc=features.mfcc(y, sr),
+                )
+                stages[structure_future] = "Analyzing structure"
+            
+            # Ses şiddeti/istatistik analizi
+            # Zaten yüklenmiş ses verisini kullan (RAM tasarrufu)
+            # Mono ses loudness analizi için yeterlidir
+            # Mono kaynakta parlaklık/akort aynı dalga formunun STFT'sini kullanır
+            loudness_future = executor.submit(
+                self.loudness_analyzer.analyze,
+                audio.samples,
+                audio.sample_rate,
+                S=features.stft_magnitude(y, sr) if audio.samples.ndim == 1 else None,
+            )
+            stages[loudness_future] = "Analyzing loudness"
+            
+            # Akor analizi (isteğe bağlı; çok kısa kliplerde atlanır). Algılama
+            # açık kalır, yalnızca yeterli veri olmadığından bölüm üretilmez
+            chord_future = None
+            chord_result = None
+            if self.options.detect_chords and audio.duration < self.MIN_CHORD_DURATION:
+                chord_result = ChordResult(
+                    enabled=True,
+                    warning="Track too short for chord detection.",
+                    segments=[],
+                    needs_confirmation=True,
+                )
+            elif self.options.detect_chords:
+                chord_future = executor.submit(
+                    self.chord_analyzer.analyze,
+                    y, sr,
+                    beat_times=beat_times,
+                    enabled=True,
+                    chroma=features.chroma(y, sr, method=self.chord_analyzer.chroma_method),
+                    beat_frames=features.beat_frames(y, sr, beat_times),
+                )
+                stages[chord_future] = "Analyzing chords"
+            
+            # İlerleme, geri arama her zaman çağıran iş parçacığında kalsın diye
+            # tamamlanan aşamalar üzerinden buradan bildirilir
+            for done, future in enumerate(as_completed(stages), start=1):
+                update_progress(stages[future], 0.3 + 0.65 * done / len(stages))
+            
+            key_result = key_future.result()
+            meter_result = meter_future.result()
+            loudness_result = loudness_future.result()
+            if structure_future:
+                structure_result = structure_future.result()
+            if chord_future:
+                chord_result = chord_future.result()
         
         # Giriş sayımını (count-in) algılanan ölçü ile güncelle
         if tempo_result.count_in:
             tempo_result.count_in.meter = meter_result.value
             tempo_result.count_in.beats_per_bar = meter_result.numerator
         
-        update_progress("Analyzing meter", 0.6)
-        
-        # Yapı analizi
-        update_progress("Analyzing structure", 0.65)
-        structure_result = self.structure_analyzer.analyze(y, sr, beat_times=beat_times)
-        update_progress("Analyzing structure", 0.75)
-        
-        # Ses şiddeti/istatistik analizi
-        update_progress("Analyzing loudness", 0.8)
-        
-        # Zaten yüklenmiş ses verisini kullan (RAM tasarrufu)
-        # Mono ses loudness analizi için yeterlidir
-        loudness_result = self.loudness_analyzer.analyze(
-            audio.samples,
-            audio.sample_rate,
-        )
-        update_progress("Analyzing loudness", 0.9)
-        
-        # Akor analizi (isteğe bağlı)
-        chord_result = None
-        if self.options.detect_chords:
-            update_progress("Analyzing chords", 0.92)
-            chord_result = self.chord_analyzer.analyze(
-                y, sr,
-                beat_times=beat_times,
-                enabled=True,
-            )
+        features.clear()
         
         update_progress("Finalizing", 0.98)
         
@@ -206,12 +489,75 @@ class AnalysisPipeline:
         
         return result
     
+    def analyze_batch(
+        self,
+        paths: list[str | Path],
+        max_workers: Optional[int] = None,
+        progress_callback: Optional[Callable[[str, float], None]] = None,
+    ) -> list[AnalysisResult]:
+        """
+        Birden çok ses dosyasını ayrı süreçlerde paralel analiz et.
+        
+        Dosyalar birbirinden bağımsızdır; her işçi süreci kendi AnalysisPipeline
+        örneğini aynı seçeneklerle kurar. Önbellekte olan dosyalar süreç
+        başlatılmadan doğrudan döndürülür.
+        
+        Args:
+            paths: Ses dosyalarının yolları
+            max_workers: En fazla işçi süreci sayısı
+                (None: min(BATCH_MAX_WORKERS, CPU sayısı))
+            progress_callback: İsteğe bağlı callback(filename, completed_ratio)
+            
+        Returns:
+            paths ile aynı sırada AnalysisResult listesi
+        """
+        paths = [Path(p) for p in paths]
+        results: list[Optional[AnalysisResult]] = [None] * len(paths)
+        completed = 0
+        
+        def update_progress(path: Path):
+            nonlocal completed
+            completed += 1
+            if progress_callback:
+                progress_callback(path.name, completed / len(paths))
+        
+        pending = []
+        for i, path in enumerate(paths):
+            cached = self._load_from_cache(path) if self.options.use_cache else None
+            if cached:
+                results[i] = cached
+                update_progress(path)
+            else:
+                pending.append(i)
+        
+        if pending:
+            if max_workers is None:
+                max_workers = min(self.BATCH_MAX_WORKERS, os.cpu_count() or 1)
+            max_workers = min(max_workers, len(pending))
+            
+            with ProcessPoolExecutor(
+                max_workers=max_workers,
+                initializer=_init_batch_worker,
+                initargs=(self.options,),
+            ) as executor:
+                futures = {executor.submit(_analyze_in_worker, paths[i]): i for i in pending}
+                
+                for future in as_completed(futures):
+                    i = futures[future]
+                    results[i] = future.result()
+                    if self.options.use_cache:
+                        # İşçi diske yazdı; bellek içi önbelleği de doldur
+                        self._remember_result(self._result_cache_key(paths[i]), results[i])
+                    update_progress(paths[i])
+        
+        return results
+    
     def analyze_tempo_only(
         self,
         path: str | Path,
     ):
         """Hızlı sadece-tempo analizi."""
-        audio = self.loader.load(path, mono=True)
+        audio = self._load_audio(path)
         return self.tempo_analyzer.analyze(audio.samples_mono, audio.sample_rate)
     
     def analyze_key_only(
@@ -219,49 +565,132 @@ class AnalysisPipeline:
         path: str | Path,
     ):
         """Hızlı sadece-ton analizi."""
-        audio = self.loader.load(path, mono=True)
+        audio = self._load_audio(path)
         return self.key_analyzer.analyze(audio.samples_mono, audio.sample_rate)
     
+    def _load_audio(self, path: str | Path) -> AudioData:
+        """
+        Sesi yükle; aynı dosya (yol, boyut, mtime) yakın zamanda yüklendiyse
+        çözme ve yeniden örneklemeyi atlayıp bellekteki kopyayı döndür.
+        """
+        path = Path(path)
+        stat = path.stat()
+        cache_key = (str(path.resolve()), stat.st_size, stat.st_mtime_ns)
+        
+        audio = self._audio_cache.get(cache_key)
+        if audio is not None:
+            self._audio_cache.move_to_end(cache_key)
+            return audio
+        
+        audio = self.loader.load(path, mono=True)
+        self._audio_cache[cache_key] = audio
+        if len(self._audio_cache) > self.AUDIO_CACHE_SIZE:
+            self._audio_cache.popitem(last=False)
+        
+        return audio
+    
     def _get_cache_path(self, audio_path: Path) -> Path:
         """Dosya hash'ine göre önbellek dosyası yolu oluştur."""
-        # Hash girişi olarak dosya boyutu + değişiklik zamanı + yol kullan
+        # Hash girişi: dosya boyutu + değişiklik zamanı + baştan/sondan örneklenen içerik.
+        # Yol anahtara girmez; böylece önbellek taşınan/kopyalanan dosyalarda da geçerlidir.
         stat = audio_path.stat()
-        hash_input = f"{audio_path.absolute()}:{stat.st_size}:{stat.st_mtime}"
-        file_hash = hashlib.md5(hash_input.encode()).hexdigest()[:16]
-        return self.cache_dir / f"{file_hash}.json"
+        if XXHASH_AVAILABLE:
+            hasher = xxhash.xxh3_64()
+        else:
+            hasher = hashlib.blake2b(digest_size=8)
+        
+        hasher.update(str(stat.st_size).encode())
+        hasher.update(str(int(stat.st_mtime)).encode())
+        
+        with open(audio_path, "rb") as f:
+            hasher.update(f.read(self.CACHE_KEY_SAMPLE_BYTES))
+            if stat.st_size > 2 * self.CACHE_KEY_SAMPLE_BYTES:
+                f.seek(-self.CACHE_KEY_SAMPLE_BYTES, 2)
+                hasher.update(f.read())
+        
+        file_hash = hasher.hexdigest()[:16]
+        suffix = ".pkl" if self.options.pickle_cache else ".json.gz"
+        return self.cache_dir / f"{file_hash}{suffix}"
+    
+    @staticmethod
+    def _result_cache_key(path: Path) -> tuple:
+        """Bellek içi sonuç önbelleği anahtarı (yalnızca stat, hash yok)."""
+        stat = path.stat()
+        return (str(path.absolute()), stat.st_size, stat.st_mtime_ns)
+    
+    def _remember_result(self, cache_key: tuple, result: AnalysisResult):
+        """Sonucun bir kopyasını bellek içi önbellekte sakla."""
+        # Çağıranın sonucu değiştirmesi önbelleği etkilemesin diye döküm sakla;
+        # dökümden doğrulama, model_copy(deep=True)'dan belirgin şekilde hızlıdır
+        self._result_cache[cache_key] = result.model_dump()
+        self._result_cache.move_to_end(cache_key)
+        if len(self._result_cache) > self.RESULT_CACHE_SIZE:
+            self._result_cache.popitem(last=False)
     
     def _load_from_cache(self, path: Path) -> Optional[AnalysisResult]:
-        """Varsa önbelleğe alınmış analizi yükle."""
+        """Varsa önbelleğe alınmış analizi yükle (önce bellek, sonra disk)."""
+        memo_key = self._result_cache_key(path)
+        cached = self._result_cache.get(memo_key)
+        if cached is not None:
+            self._result_cache.move_to_end(memo_key)
+            return AnalysisResult.model_validate(cached)
+        
         cache_path = self._get_cache_path(path)
         
         if not cache_path.exists():
             return None
         
         try:
-            with open(cache_path, "r", encoding="utf-8") as f:
-                data = json.load(f)
-            
-            return AnalysisResult.model_validate(data)
+            if self.options.pickle_cache:
+                with open(cache_path, "rb") as f:
+                    version, result = pickle.load(f)
+                if version != self.CACHE_FORMAT_VERSION or not isinstance(result, AnalysisResult):
+                    raise ValueError("Stale cache format")
+            else:
+                raw = gzip.decompress(cache_path.read_bytes())
+                data = orjson.loads(raw) if ORJSON_AVAILABLE else json.loads(raw)
+                result = AnalysisResult.model_validate(data)
         except Exception:
             # Geçersiz önbellek, kaldır
             cache_path.unlink(missing_ok=True)
             return None
+
+        # Anahtar yolu içermediğinden girdi aynı içerikli başka bir dosyaya
+        # (kopya/taşınmış) ait olabilir; parça kimliği istenen yoldan alınır
+        result.track.path = str(path.absolute())
+        result.track.filename = path.name
+
+        self._remember_result(memo_key, result)
+        return result
     
     def _save_to_cache(self, path: Path, result: AnalysisResult):
-        """Analizi önbelleğe kaydet."""
+        """Analizi önbelleğe kaydet (pickle veya sıkıştırılmış, girintisiz JSON)."""
+        self._remember_result(self._result_cache_key(path), result)
+        
         cache_path = self._get_cache_path(path)
         
         try:
-            with open(cache_path, "w", encoding="utf-8") as f:
-                json.dump(result.model_dump(), f, indent=2)
+            if self.options.pickle_cache:
+                with open(cache_path, "wb") as f:
+                    pickle.dump((self.CACHE_FORMAT_VERSION, result), f, protocol=5)
+                return
+            
+            data = result.model_dump()
+            if ORJSON_AVAILABLE:
+                raw = orjson.dumps(data, option=orjson.OPT_SERIALIZE_NUMPY)
+            else:
+                raw = json.dumps(data, separators=(",", ":")).encode("utf-8")
+            cache_path.write_bytes(gzip.compress(raw, compresslevel=1))
         except Exception:
             pass  # Önbellek hatası kritik değil
     
     def clear_cache(self):
         """Tüm önbelleğe alınmış analizleri temizle."""
+        self._result_cache.clear()
         if self.cache_dir.exists():
-            for cache_file in self.cache_dir.glob("*.json"):
-                cache_file.unlink()
+            for pattern in ("*.pkl", "*.json*"):
+                for cache_file in self.cache_dir.glob(pattern):
+                    cache_file.unlink()
     
     def export_json(self, result: AnalysisResult, output_path: str | Path):
         """Analiz sonucunu JSON dosyasına aktar."""
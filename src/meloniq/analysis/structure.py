@@ -4,7 +4,7 @@
 Algoritma:
 1. Zaman içinde öznitelikleri (chroma, MFCC) hesapla
 2. Öz-benzerlik matrisi (Self-similarity matrix - SSM)
-3. SSM köşegeninden yenilik (novelty) eğrisi
+3. SSM köşegeninden yenilik (novelty) eğrisi (yalnızca köşegen bandı hesaplanır)
 4. Bölüm sınırları için tepe seçimi (Peak picking)
 5. Benzer bölümleri kümele/etiketle (A/B/C veya Intro/Verse/Chorus)
 
@@ -15,9 +15,46 @@ import numpy as np
 import librosa
 from scipy import ndimage
 from scipy.signal import find_peaks
+from scipy.signal.windows import gaussian
 from typing import Optional
 
 from ..models.results import StructureResult, StructureSegment
+from ._jit import njit
+
+
+@njit(fastmath=True)
+def _banded_novelty(features: np.ndarray, kernel: np.ndarray) -> np.ndarray:
+    """
+    Tam SSM'yi oluşturmadan dama tahtası yeniliği.
+    
+    SSM = features @ features.T simetriktir ve çekirdek yalnızca köşegen
+    çevresindeki (k, k) bölgeleri okur; bu yüzden yalnızca band[p, d] =
+    <F[p], F[p + d]> (0 <= d < k) hesaplanır. Bellek O(n²) yerine O(n·k)'dır.
+    Çekirdek simetrik olduğundan köşegen dışı terimler iki kez sayılır.
+    """
+    n, dim = features.shape
+    k = kernel.shape[0]
+    half = k // 2
+    
+    band = np.zeros((n, k), dtype=np.float32)
+    for p in range(n):
+        for d in range(min(k, n - p)):
+            acc = 0.0
+            for c in range(dim):
+                acc += features[p, c] * features[p + d, c]
+            band[p, d] = acc
+    
+    novelty = np.zeros(n)
+    for i in range(half, n - half):
+        start = i - half
+        acc = 0.0
+        for a in range(k):
+            acc += kernel[a, a] * band[start + a, 0]
+            for b in range(a + 1, k):
+                acc += 2.0 * kernel[a, b] * band[start + a, b - a]
+        novelty[i] = acc
+    
+    return novelty
 
 
 class StructureAnalyzer:
@@ -31,6 +68,12 @@ class StructureAnalyzer:
     # Parametreler
     MIN_SEGMENT_DURATION = 5.0  # Saniye cinsinden minimum bölüm uzunluğu
     MAX_SEGMENTS = 20  # Maksimum bölüm sayısı
+    MIN_DURATION = 30.0  # Bundan kısa parçalar tek bölüm olarak döner
+    
+    # Dama tahtası çekirdeğinin en büyük boyutu (SSM sütunu cinsinden)
+    KERNEL_SIZE = 64  # Çerçeve çözünürlüğünde (~1.5 s)
+    BEAT_KERNEL_SIZE = 16  # Vuruş çözünürlüğünde (4/4'te 4 ölçü)
+    MIN_SYNC_BEATS = 16  # Vuruş-senkronize SSM için gereken en az vuruş
     
     # Güvenilirlik eşikleri
     HIGH_CONFIDENCE = 0.7
@@ -38,12 +81,16 @@ class StructureAnalyzer:
     
     def __init__(self, hop_length: int = 512):
         self.hop_length = hop_length
+        # Çekirdek boyutu -> dama tahtası çekirdeği
+        self._kernel_cache: dict[int, np.ndarray] = {}
     
     def analyze(
         self, 
         y: np.ndarray, 
         sr: int,
         beat_times: Optional[list[float]] = None,
+        chroma: Optional[np.ndarray] = None,
+        mfcc: Optional[np.ndarray] = None,
     ) -> StructureResult:
         """
         Şarkı yapısını bölümlere ayır.
@@ -52,13 +99,15 @@ class StructureAnalyzer:
             y: Ses örnekleri (mono)
             sr: Örnekleme oranı
             beat_times: Vuruş-senkronize analiz için vuruş zamanları (isteğe bağlı)
+            chroma: Önceden hesaplanmış (12, n_frames) CQT kromagramı (isteğe bağlı)
+            mfcc: Önceden hesaplanmış (13, n_frames) MFCC (isteğe bağlı)
             
         Returns:
             Bölüm sınırları ve etiketleri ile StructureResult
         """
         duration = len(y) / sr
         
-        if duration < 30:
+        if duration < self.MIN_DURATION:
             # Çok kısa parça
             return StructureResult(
                 segments=[StructureSegment(
@@ -72,19 +121,33 @@ class StructureAnalyzer:
             )
         
         # Öznitelikleri hesapla
-        chroma, mfcc = self._compute_features(y, sr)
+        chroma, mfcc = self._compute_features(y, sr, chroma, mfcc)
+        
+        # Vuruşlar varsa öznitelikleri vuruşlara senkronize et: sınırlar yalnızca
+        # vuruş çözünürlüğünde anlamlıdır ve SSM O(n_frames²) yerine O(n_beats²) olur
+        column_times = None
+        kernel_size = self.KERNEL_SIZE
+        ssm_chroma, ssm_mfcc = chroma, mfcc
         
-        # Öz-benzerlik matrisini hesapla
-        ssm = self._compute_ssm(chroma, mfcc)
+        if beat_times is not None and len(beat_times) >= self.MIN_SYNC_BEATS:
+            beat_frames = librosa.time_to_frames(beat_times, sr=sr, hop_length=self.hop_length)
+            bounds = librosa.util.fix_frames(beat_frames, x_min=0, x_max=chroma.shape[1])
+            ssm_chroma = librosa.util.sync(chroma, bounds, aggregate=np.median)
+            ssm_mfcc = librosa.util.sync(mfcc, bounds, aggregate=np.median)
+            column_times = librosa.frames_to_time(bounds[:-1], sr=sr, hop_length=self.hop_length)
+            kernel_size = self.BEAT_KERNEL_SIZE
+        
+        # Öz-benzerlik öznitelikleri (SSM = F @ F.T, açıkça oluşturulmaz)
+        ssm_features = self._compute_ssm_features(ssm_chroma, ssm_mfcc)
         
         # Yenilik eğrisini çıkar
-        novelty = self._compute_novelty(ssm)
+        novelty = self._compute_novelty(ssm_features, kernel_size)
         
         # Bölüm sınırlarını bul
-        boundaries = self._find_boundaries(novelty, duration)
+        boundaries = self._find_boundaries(novelty, duration, column_times)
         
         # Etiketlerle bölümler oluştur
-        segments = self._create_segments(boundaries, duration, ssm, chroma)
+        segments = self._create_segments(boundaries, duration, chroma)
         
         # Müzikal etiketler ata
         segments = self._assign_labels(segments, chroma)
@@ -101,78 +164,78 @@ class StructureAnalyzer:
         self, 
         y: np.ndarray, 
         sr: int,
+        chroma: Optional[np.ndarray] = None,
+        mfcc: Optional[np.ndarray] = None,
     ) -> tuple[np.ndarray, np.ndarray]:
-        """Kroma ve MFCC özniteliklerini hesapla."""
+        """Kroma ve MFCC özniteliklerini hesapla (verilmemiş olanları)."""
         # Harmonik içerik için Kroma
-        chroma = librosa.feature.chroma_cqt(
-            y=y, 
-            sr=sr, 
-            hop_length=self.hop_length,
-        )
+        if chroma is None:
+            chroma = librosa.feature.chroma_cqt(
+                y=y, 
+                sr=sr, 
+                hop_length=self.hop_length,
+            )
         
         # Tınısal içerik için MFCC
-        mfcc = librosa.feature.mfcc(
-            y=y, 
-            sr=sr, 
-            n_mfcc=13,
-            hop_length=self.hop_length,
-        )
+        if mfcc is None:
+            mfcc = librosa.feature.mfcc(
+                y=y, 
+                sr=sr, 
+                n_mfcc=13,
+                hop_length=self.hop_length,
+            )
         
-        return chroma, mfcc
+        # SSM bu dizilerden türetilir; float32 tutmak bellek trafiğini yarıya indirir
+        return chroma.astype(np.float32, copy=False), mfcc.astype(np.float32, copy=False)
     
-    def _compute_ssm(
+    def _compute_ssm_features(
         self, 
         chroma: np.ndarray, 
         mfcc: np.ndarray,
     ) -> np.ndarray:
         """
-        Özniteliklerden öz-benzerlik matrisini hesapla.
+        Öz-benzerlik için (n, 25) ağırlıklı öznitelik matrisi F.
         
-        Kroma (armoni) ve MFCC (tını) benzerliklerini birleştirir.
+        F @ F.T = 0.6 * kroma benzerliği + 0.4 * MFCC benzerliği (harmoniği daha
+        fazla ağırlıklandır); yani kroma (armoni) ve MFCC (tını) benzerliklerini
+        birleştiren SSM'dir.
         """
         # Öznitelikleri normalize et
         chroma_norm = librosa.util.normalize(chroma, axis=0)
         mfcc_norm = librosa.util.normalize(mfcc, axis=0)
         
-        # Benzerlik matrislerini hesapla
-        chroma_sim = np.dot(chroma_norm.T, chroma_norm)
-        mfcc_sim = np.dot(mfcc_norm.T, mfcc_norm)
-        
-        # Birleştir (harmoniği daha fazla ağırlıklandır)
-        ssm = 0.6 * chroma_sim + 0.4 * mfcc_sim
-        
-        # Simetrik olmasını sağla
-        ssm = (ssm + ssm.T) / 2
+        stacked = np.vstack([
+            0.6 ** 0.5 * chroma_norm,
+            0.4 ** 0.5 * mfcc_norm,
+        ])
         
-        return ssm
+        return np.ascontiguousarray(stacked.T)
     
-    def _compute_novelty(self, ssm: np.ndarray) -> np.ndarray:
+    def _compute_novelty(
+        self,
+        features: np.ndarray,
+        max_kernel_size: int = KERNEL_SIZE,
+    ) -> np.ndarray:
         """
         Dama tahtası çekirdeği (checkerboard kernel) kullanarak SSM'den yenilik eğrisini hesapla.
         
+        SSM features @ features.T olarak tanımlıdır; çekirdeğin okuduğu köşegen
+        bandı doğrudan özniteliklerden hesaplanır, (n, n) matris oluşturulmaz.
         Yenilikteki tepeler bölüm sınırlarını gösterir.
         """
-        n = ssm.shape[0]
+        n = features.shape[0]
         
         # Yenilik tespiti için dama tahtası çekirdeği
-        kernel_size = min(64, n // 4)
+        kernel_size = min(max_kernel_size, n // 4)
         if kernel_size < 4:
             return np.zeros(n)
         
-        # Dama tahtası çekirdeğini oluştur
-        kernel = np.ones((kernel_size, kernel_size))
-        kernel[:kernel_size//2, :kernel_size//2] = -1
-        kernel[kernel_size//2:, kernel_size//2:] = -1
-        
-        # Köşegen boyunca konvolüsyon (convolve)
-        novelty = np.zeros(n)
+        # Dama tahtası çekirdeği (bölge köşegen etrafında ±half)
         half = kernel_size // 2
+        kernel_size = 2 * half
+        kernel = self._checkerboard_kernel(kernel_size)
         
-        for i in range(half, n - half):
-            # Köşegen etrafındaki bölgeyi çıkar
-            region = ssm[i-half:i+half, i-half:i+half]
-            if region.shape == kernel.shape:
-                novelty[i] = np.sum(region * kernel)
+        novelty = _banded_novelty(features, kernel)
         
         # Normalize et
         novelty = np.maximum(0, novelty)
@@ -184,38 +247,63 @@ class StructureAnalyzer:
         
         return novelty
     
+    def _checkerboard_kernel(self, kernel_size: int) -> np.ndarray:
+        """
+        Gauss ile yumuşatılmış dama tahtası çekirdeği (boyut başına bir kez oluşturulur).
+        
+        Aynı bölüm içindeki (köşegen) çeyrekler +1, bölümler arası çeyrekler -1
+        ağırlık alır; böylece sınırlarda yenilik pozitif tepe verir.
+        """
+        if kernel_size not in self._kernel_cache:
+            half = kernel_size // 2
+            signs = np.concatenate([-np.ones(half), np.ones(kernel_size - half)])
+            taper = gaussian(kernel_size, kernel_size / 4)
+            kernel = np.outer(signs, signs) * np.outer(taper, taper)
+            self._kernel_cache[kernel_size] = kernel.astype(np.float32)
+        
+        return self._kernel_cache[kernel_size]
+    
     def _find_boundaries(
         self, 
         novelty: np.ndarray, 
         duration: float,
+        column_times: Optional[np.ndarray] = None,
     ) -> list[float]:
-        """Yenilik tepelerinden bölüm sınırlarını bul."""
+        """
+        Yenilik tepelerinden bölüm sınırlarını bul.
+        
+        column_times verilirse yenilik vuruş-senkronizedir ve her sütunun
+        başlangıç zamanı buradan okunur; aksi halde sütunlar STFT çerçeveleridir.
+        """
         if len(novelty) == 0:
             return [0.0, duration]
         
-        # Tepeler arasındaki minimum mesafe (çerçeve cinsinden)
-        min_frames = int(self.MIN_SEGMENT_DURATION * 22050 / self.hop_length)
+        # Tepeler arasındaki minimum mesafe (sütun cinsinden)
+        if column_times is not None:
+            column_period = np.median(np.diff(column_times)) if len(column_times) > 1 else 0.0
+            min_columns = max(1, int(self.MIN_SEGMENT_DURATION / column_period)) if column_period > 0 else 1
+        else:
+            min_columns = int(self.MIN_SEGMENT_DURATION * 22050 / self.hop_length)
         
         # Tepeleri bul
         peaks, properties = find_peaks(
             novelty,
             height=0.2,  # Minimum tepe yüksekliği
-            distance=min_frames,
+            distance=min_columns,
             prominence=0.1,
         )
         
-        # Zamanlara dönüştür
-        frame_times = librosa.frames_to_time(
-            np.arange(len(novelty)), 
-            sr=22050, 
-            hop_length=self.hop_length
-        )
+        # Yalnızca seçilen tepeleri zamanlara dönüştür
+        if column_times is not None:
+            peak_times = column_times[peaks[:self.MAX_SEGMENTS - 1]]
+        else:
+            peak_times = librosa.frames_to_time(
+                peaks[:self.MAX_SEGMENTS - 1],
+                sr=22050,
+                hop_length=self.hop_length,
+            )
         
-        boundaries = [0.0]
-        for peak in peaks[:self.MAX_SEGMENTS - 1]:
-            if peak < len(frame_times):
-                boundaries.append(frame_times[peak])
-        boundaries.append(duration)
+        boundaries = [0.0, *peak_times.tolist(), duration]
         
         return boundaries
     
@@ -223,10 +311,12 @@ class StructureAnalyzer:
         self,
         boundaries: list[float],
         duration: float,
-        ssm: np.ndarray,
         chroma: np.ndarray,
     ) -> list[StructureSegment]:
         """Sınırlardan bölüm nesneleri oluştur."""
+        # Önceki bölümle benzerlikler (tüm bölümler için tek geçişte)
+        similarities = self._segment_similarities(chroma, boundaries)
+        
         segments = []
         
         for i in range(len(boundaries) - 1):
@@ -242,66 +332,54 @@ class StructureAnalyzer:
             else:
                 confidence = 0.55
             
-            # Önceki bölümle benzerliği hesapla
-            similarity = None
-            if i > 0 and len(segments) > 0:
-                similarity = self._calculate_segment_similarity(
-                    chroma, boundaries[i-1], start, end
-                )
-            
             segments.append(StructureSegment(
                 start=round(start, 2),
                 end=round(end, 2),
                 label=f"Section {chr(65 + i)}",  # A, B, C, ...
                 confidence=round(confidence, 2),
-                similarity_to_previous=similarity,
+                similarity_to_previous=similarities[i],
             ))
         
         return segments
     
-    def _calculate_segment_similarity(
+    def _segment_similarities(
         self,
         chroma: np.ndarray,
-        prev_start: float,
-        current_start: float,
-        current_end: float,
-    ) -> float:
-        """Bölümler arasındaki benzerliği hesapla."""
-        try:
-            # Çerçeve indekslerine dönüştür
-            frame_rate = 22050 / self.hop_length
-            
-            prev_frames = slice(
-                int(prev_start * frame_rate),
-                int(current_start * frame_rate)
-            )
-            curr_frames = slice(
-                int(current_start * frame_rate),
-                int(current_end * frame_rate)
-            )
-            
-            prev_chroma = chroma[:, prev_frames]
-            curr_chroma = chroma[:, curr_frames]
-            
-            if prev_chroma.size == 0 or curr_chroma.size == 0:
-                return None
-            
-            # Ortalama kroma vektörleri
-            prev_avg = np.mean(prev_chroma, axis=1)
-            curr_avg = np.mean(curr_chroma, axis=1)
-            
-            # Kosinüs benzerliği
-            norm_prev = np.linalg.norm(prev_avg)
-            norm_curr = np.linalg.norm(curr_avg)
-            
-            if norm_prev > 0 and norm_curr > 0:
-                similarity = np.dot(prev_avg, curr_avg) / (norm_prev * norm_curr)
-                return round(float(similarity), 2)
-            
-        except Exception:
-            pass
+        boundaries: list[float],
+    ) -> list[Optional[float]]:
+        """
+        Her bölümün bir önceki bölümle kroma kosinüs benzerliği.
         
-        return None
+        Bölüm ortalamaları kümülatif toplamlardan tek seferde çıkarılır.
+        İlk bölüm ve boş/sessiz bölüm çiftleri için None döner.
+        """
+        n_frames = chroma.shape[1]
+        frame_rate = 22050 / self.hop_length
+        
+        # Sınırların çerçeve indeksleri (dilimleme gibi [0, n_frames] aralığına kırpılır)
+        frames = np.array([int(b * frame_rate) for b in boundaries], dtype=np.int64)
+        frames = np.clip(frames, 0, n_frames)
+        starts, ends = frames[:-1], frames[1:]
+        counts = np.maximum(ends - starts, 0)
+        
+        # Ortalama kroma vektörleri (n_segments, 12)
+        cumulative = np.zeros((n_frames + 1, chroma.shape[0]))
+        np.cumsum(chroma.T, axis=0, out=cumulative[1:])
+        sums = cumulative[np.maximum(ends, starts)] - cumulative[starts]
+        means = sums / np.maximum(counts, 1)[:, None]
+        norms = np.linalg.norm(means, axis=1)
+        
+        # Kosinüs benzerliği (ardışık bölüm çiftleri)
+        dots = np.einsum("ij,ij->i", means[1:], means[:-1])
+        valid = (counts[1:] > 0) & (counts[:-1] > 0) & (norms[1:] > 0) & (norms[:-1] > 0)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            cosine = dots / (norms[1:] * norms[:-1])
+        
+        similarities: list[Optional[float]] = [None]
+        for ok, value in zip(valid, cosine):
+            similarities.append(round(float(value), 2) if ok else None)
+        
+        return similarities
     
     def _assign_labels(
         self,
@@ -320,43 +398,42 @@ class StructureAnalyzer:
             return segments
         
         n = len(segments)
-        labeled = []
+        
+        # Bölüm istatistikleri
+        starts = np.array([seg.start for seg in segments])
+        durations = np.array([seg.end - seg.start for seg in segments])
+        similarities = np.array([
+            np.nan if seg.similarity_to_previous is None else seg.similarity_to_previous
+            for seg in segments
+        ])
+        position_ratios = starts / (segments[-1].end or 1)
+        index = np.arange(n)
         
         # Basit buluşsallar (heuristics)
-        for i, seg in enumerate(segments):
-            position_ratio = seg.start / (segments[-1].end or 1)
-            
-            # En baş -> muhtemelen Giriş (Intro)
-            if i == 0 and seg.end - seg.start < 30 and position_ratio < 0.1:
-                label = "Intro"
-                confidence = 0.6
-            # En son -> muhtemelen Çıkış (Outro)
-            elif i == n - 1 and position_ratio > 0.85:
-                label = "Outro"
-                confidence = 0.5
-            # Daha önceki bölümlere benzerliği kontrol et
-            elif seg.similarity_to_previous is not None and seg.similarity_to_previous > 0.85:
-                # Öncekine çok benzer - aynı bölüm türü olabilir
-                prev_label = labeled[-1].label if labeled else "Section"
-                if "Verse" in prev_label or "Chorus" in prev_label:
-                    label = prev_label
-                else:
-                    label = seg.label
-                confidence = 0.5
+        # En baş -> muhtemelen Giriş (Intro)
+        is_intro = (index == 0) & (durations < 30) & (position_ratios < 0.1)
+        # En son -> muhtemelen Çıkış (Outro)
+        is_outro = ~is_intro & (index == n - 1) & (position_ratios > 0.85)
+        # Öncekine çok benzer - aynı bölüm türü olabilir (NaN karşılaştırması False)
+        is_repeat = ~is_intro & ~is_outro & (similarities > 0.85)
+        
+        # Yalnızca değişen alanlar yerinde güncellenir; diğer bölümler genel
+        # etiketini ve güvenilirliğini korur
+        for i in np.flatnonzero(is_intro | is_outro | is_repeat):
+            seg = segments[i]
+            if is_intro[i]:
+                seg.label = "Intro"
+                seg.confidence = 0.6
+            elif is_outro[i]:
+                seg.label = "Outro"
+                seg.confidence = 0.5
             else:
-                # Genel etiketi koru
-                label = seg.label
-                confidence = seg.confidence
-            
-            labeled.append(StructureSegment(
-                start=seg.start,
-                end=seg.end,
-                label=label,
-                confidence=confidence,
-                similarity_to_previous=seg.similarity_to_previous,
-            ))
+                prev_label = segments[i - 1].label if i > 0 else "Section"
+                if "Verse" in prev_label or "Chorus" in prev_label:
+                    seg.label = prev_label
+                seg.confidence = 0.5
         
-        return labeled
+        return segments
     
     def _generate_explanation(self, segments: list[StructureSegment]) -> str:
         """Yapı analizinin açıklamasını oluştur."""
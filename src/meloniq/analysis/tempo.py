@@ -13,6 +13,7 @@ Sağlam güven puanlaması ile son derece doğru BPM sağlar.
 
 import numpy as np
 import librosa
+from concurrent.futures import ThreadPoolExecutor
 from typing import Optional, Tuple
 import warnings
 
@@ -46,6 +47,17 @@ class TempoAnalyzer:
     MEDIUM_CONFIDENCE = 0.70
     LOW_CONFIDENCE = 0.50
     
+    # Topluluk yöntemleri için iş parçacığı sayısı
+    MAX_WORKERS = 4
+    
+    # DeepRhythm girdi örnekleme oranı; CNN küçük yeniden örnekleme
+    # artefaktlarına dayanıklı olduğundan en hızlı soxr kalitesi yeterli
+    DEEPRHYTHM_SR = 22050
+    DEEPRHYTHM_RES_TYPE = "soxr_qq"
+    
+    # DeepRhythm ile beat_track bu oranda uyuşursa tempogram yöntemleri atlanır
+    CNN_AGREEMENT_TOLERANCE = 0.03
+    
     def __init__(self, hop_length: int = 512):
         self.hop_length = hop_length
         
@@ -80,30 +92,55 @@ class TempoAnalyzer:
         Returns:
             BPM, vuruşlar, güven ve alternatifleri içeren TempoResult
         """
+        # Başlangıç zarflarını bir kez hesapla (tüm yöntemler paylaşır)
+        onset_env, beat_env = self._onset_envelopes(y, sr)
+        
+        # Yöntemler paylaşılan zarflar verildiğinde birbirinden bağımsızdır ve
+        # işlerini GIL'i bırakan numpy/FFT (ve varsa PyTorch) kodunda yapar;
+        # bu yüzden eşzamanlı çalıştırılırlar
+        with ThreadPoolExecutor(max_workers=self.MAX_WORKERS) as executor:
+            # Yöntem 1: DeepRhythm CNN (en doğru)
+            deeprhythm_future = None
+            if self._predictor is not None:
+                deeprhythm_future = executor.submit(self._predict_with_deeprhythm, y, sr)
+            
+            # Yöntem 2: Librosa beat_track
+            beat_future = executor.submit(self._librosa_beat_track, beat_env, sr)
+            
+            # Yöntem 3-4: Tempogram PLP (Baskın Yerel Nabız) ve otokorelasyon.
+            # DeepRhythm varsa önce CNN ile beat_track'in uyuşup uyuşmadığı
+            # beklenir; uyuşuyorlarsa bu iki tempogram hesaplanmaz. Bu bir
+            # hız/doğruluk ödünleşimidir: PLP/ACF tahminleri kümelemeyi, küme
+            # içi ağırlıklı ortalamayı (nihai BPM), güvenilirliği ve adayları
+            # etkiler, dolayısıyla atlanmaları sonucu değiştirebilir; iki güçlü
+            # yöntem zaten uyuştuğunda fark genellikle küçüktür
+            plp_future = acf_future = None
+            if deeprhythm_future is None:
+                plp_future = executor.submit(self._tempogram_plp, onset_env, sr)
+                acf_future = executor.submit(self._tempogram_acf, onset_env, sr)
+            
+            deeprhythm_bpm = None
+            if deeprhythm_future is not None:
+                try:
+                    deeprhythm_bpm = deeprhythm_future.result()
+                except Exception:
+                    pass
+            librosa_bpm, beat_frames = beat_future.result()
+            
+            if plp_future is None and not self._cnn_agrees(deeprhythm_bpm, librosa_bpm):
+                plp_future = executor.submit(self._tempogram_plp, onset_env, sr)
+                acf_future = executor.submit(self._tempogram_acf, onset_env, sr)
+            
+            plp_bpm = plp_future.result() if plp_future is not None else None
+            acf_bpm = acf_future.result() if acf_future is not None else None
+        
         # Birden fazla yöntemden tempo tahminlerini topla
         estimates = []
-        
-        # Yöntem 1: DeepRhythm CNN (en doğru)
-        deeprhythm_bpm = None
-        if self._predictor is not None:
-            try:
-                deeprhythm_bpm = self._predict_with_deeprhythm(y, sr)
-                if deeprhythm_bpm is not None:
-                    estimates.append(('deeprhythm', deeprhythm_bpm, 0.95))  # Yüksek ağırlık
-            except Exception:
-                pass
-        
-        # Yöntem 2: Librosa beat_track
-        librosa_bpm, beat_frames = self._librosa_beat_track(y, sr)
+        if deeprhythm_bpm is not None:
+            estimates.append(('deeprhythm', deeprhythm_bpm, 0.95))  # Yüksek ağırlık
         estimates.append(('librosa_beat', librosa_bpm, 0.70))
-        
-        # Yöntem 3: Tempogram PLP (Baskın Yerel Nabız)
-        plp_bpm = self._tempogram_plp(y, sr)
         if plp_bpm is not None:
             estimates.append(('plp', plp_bpm, 0.65))
-        
-        # Yöntem 4: Otokorelasyon tempogramı
-        acf_bpm = self._tempogram_acf(y, sr)
         if acf_bpm is not None:
             estimates.append(('acf', acf_bpm, 0.60))
         
@@ -111,7 +148,7 @@ class TempoAnalyzer:
         final_bpm, confidence, candidates = self._ensemble_tempo(estimates)
         
         # Tahmini tempoyu kullanarak vuruş zamanlarını al
-        beat_times = self._track_beats_with_tempo(y, sr, final_bpm)
+        beat_times = self._track_beats_with_tempo(y, sr, final_bpm, beat_env)
         
         # Güçlü vuruşları (downbeats) tahmin et
         downbeats = []
@@ -119,7 +156,7 @@ class TempoAnalyzer:
             downbeats = self._estimate_downbeats(y, sr, beat_times)
         
         # Tempo değişikliklerini algıla
-        segments = self._detect_tempo_changes(y, sr, final_bpm)
+        segments = self._detect_tempo_changes(y, sr, final_bpm, beat_env)
         
         # Açıklama oluştur
         explanation = self._generate_explanation(final_bpm, confidence, candidates, 
@@ -145,6 +182,24 @@ class TempoAnalyzer:
             count_in=count_in,
         )
     
+    def _onset_envelopes(self, y: np.ndarray, sr: int) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Tek log-mel spektrogramdan iki başlangıç (onset) zarfı.
+        
+        Tempogram/PLP/ACF ortalama, librosa beat_track ise medyan toplama
+        kullanır (beat_track(y=...) ile aynı); mel spektrogram bir kez hesaplanır.
+        """
+        mel_db = librosa.power_to_db(
+            librosa.feature.melspectrogram(y=y, sr=sr, hop_length=self.hop_length)
+        )
+        onset_env = librosa.onset.onset_strength(
+            S=mel_db, sr=sr, hop_length=self.hop_length,
+        )
+        beat_env = librosa.onset.onset_strength(
+            S=mel_db, sr=sr, hop_length=self.hop_length, aggregate=np.median,
+        )
+        return onset_env, beat_env
+    
     def _predict_with_deeprhythm(self, y: np.ndarray, sr: int) -> Optional[float]:
         """Tempo tahmini için DeepRhythm CNN kullan."""
         if self._predictor is None:
@@ -153,9 +208,11 @@ class TempoAnalyzer:
         try:
             # DeepRhythm belirli örnekleme oranında ses bekler
             # Gerekirse yeniden örnekle
-            target_sr = 22050
+            target_sr = self.DEEPRHYTHM_SR
             if sr != target_sr:
-                y_resampled = librosa.resample(y, orig_sr=sr, target_sr=target_sr)
+                y_resampled = librosa.resample(
+                    y, orig_sr=sr, target_sr=target_sr, res_type=self.DEEPRHYTHM_RES_TYPE
+                )
             else:
                 y_resampled = y
             
@@ -171,12 +228,20 @@ class TempoAnalyzer:
         except Exception:
             return None
     
-    def _librosa_beat_track(self, y: np.ndarray, sr: int) -> Tuple[float, np.ndarray]:
-        """Standart librosa vuruş takibi."""
+    def _cnn_agrees(self, deeprhythm_bpm: Optional[float], librosa_bpm: float) -> bool:
+        """DeepRhythm ile beat_track tahmini (oktav normalize) uyuşuyor mu?"""
+        if deeprhythm_bpm is None or not deeprhythm_bpm > 0 or not librosa_bpm > 0:
+            return False
+        cnn_bpm = self._normalize_to_range(deeprhythm_bpm)
+        beat_bpm = self._normalize_to_range(librosa_bpm)
+        return abs(beat_bpm - cnn_bpm) / cnn_bpm < self.CNN_AGREEMENT_TOLERANCE
+    
+    def _librosa_beat_track(self, beat_env: np.ndarray, sr: int) -> Tuple[float, np.ndarray]:
+        """Standart librosa vuruş takibi (medyan başlangıç zarfı üzerinde)."""
         with warnings.catch_warnings():
             warnings.simplefilter("ignore")
             tempo, beat_frames = librosa.beat.beat_track(
-                y=y, 
+                onset_envelope=beat_env, 
                 sr=sr, 
                 hop_length=self.hop_length,
                 start_bpm=120.0,
@@ -190,11 +255,9 @@ class TempoAnalyzer:
         
         return tempo, beat_frames
     
-    def _tempogram_plp(self, y: np.ndarray, sr: int) -> Optional[float]:
+    def _tempogram_plp(self, onset_env: np.ndarray, sr: int) -> Optional[float]:
         """Tempogramdan Baskın Yerel Nabız (PLP) kullanarak tempo çıkar."""
         try:
-            onset_env = librosa.onset.onset_strength(y=y, sr=sr, hop_length=self.hop_length)
-            
             # Compute tempogram
             tempogram = librosa.feature.tempogram(
                 onset_envelope=onset_env,
@@ -236,21 +299,9 @@ class TempoAnalyzer:
         except Exception:
             return None
     
-    def _tempogram_acf(self, y: np.ndarray, sr: int) -> Optional[float]:
+    def _tempogram_acf(self, onset_env: np.ndarray, sr: int) -> Optional[float]:
         """Otokorelasyon tempogramı kullanarak tempo çıkar."""
         try:
-            onset_env = librosa.onset.onset_strength(y=y, sr=sr, hop_length=self.hop_length)
-            
-            # Autocorrelation-based tempogram
-            tempogram = librosa.feature.tempogram(
-                onset_envelope=onset_env,
-                sr=sr,
-                hop_length=self.hop_length,
-                win_length=400,  # Longer window for better resolution
-            )
-            
-            tempi = librosa.tempo_frequencies(tempogram.shape[0], sr=sr, hop_length=self.hop_length)
-            
             # Global tempo from autocorrelation
             ac_global = librosa.autocorrelate(onset_env, max_size=len(onset_env) // 2)
             
@@ -259,14 +310,15 @@ class TempoAnalyzer:
                 # Skip the first peak (at lag 0)
                 ac_global[:10] = 0
                 
-                # Find the first significant peak
-                peaks = []
-                for i in range(1, len(ac_global) - 1):
-                    if ac_global[i] > ac_global[i-1] and ac_global[i] > ac_global[i+1]:
-                        if ac_global[i] > 0.1 * np.max(ac_global):
-                            peaks.append(i)
+                # Find the first significant peak (local maximum above 10% of the max)
+                inner = ac_global[1:-1]
+                peaks = np.flatnonzero(
+                    (inner > ac_global[:-2])
+                    & (inner > ac_global[2:])
+                    & (inner > 0.1 * np.max(ac_global))
+                ) + 1
                 
-                if peaks:
+                if len(peaks) > 0:
                     # Convert lag to BPM
                     lag = peaks[0]
                     bpm = 60.0 * sr / (lag * self.hop_length)
@@ -288,46 +340,44 @@ class TempoAnalyzer:
         if not estimates:
             return 120.0, 0.5, []
         
-        # Tüm tahminleri 60-180 BPM aralığına normalize et
+        # Tüm tahminleri 60-180 BPM aralığına normalize et (sessiz sinyalde
+        # dönen sıfır tempolar bilgi taşımaz, atlanır)
         normalized = []
         for method, bpm, weight in estimates:
+            if not bpm > 0:
+                continue
             norm_bpm = self._normalize_to_range(bpm)
             normalized.append((method, norm_bpm, weight, bpm))
         
-        # Tahminleri oktav eşdeğerliğine göre grupla
-        clusters = {}
-        for method, norm_bpm, weight, orig_bpm in normalized:
-            # En yakın kümeyi bul (%5 tolerans dahilinde)
-            found = False
-            for center in list(clusters.keys()):
-                if abs(norm_bpm - center) / center < 0.05:
-                    clusters[center].append((method, norm_bpm, weight, orig_bpm))
-                    found = True
-                    break
-            
-            if not found:
-                clusters[norm_bpm] = [(method, norm_bpm, weight, orig_bpm)]
-        
-        # En yüksek toplam ağırlığa sahip kümeyi bul
-        best_cluster = None
-        best_weight = 0
-        for center, members in clusters.items():
-            total_weight = sum(m[2] for m in members)
-            if total_weight > best_weight:
-                best_weight = total_weight
-                best_cluster = center
-        
-        # En iyi küme içinde ağırlıklı ortalamayı hesapla
-        if best_cluster is not None:
-            members = clusters[best_cluster]
-            weighted_sum = sum(m[1] * m[2] for m in members)
-            weight_sum = sum(m[2] for m in members)
-            final_bpm = weighted_sum / weight_sum if weight_sum > 0 else best_cluster
+        # Pozitif tahmin yoksa (ör. tamamen sessiz sinyal) varsayılan tempo
+        if not normalized:
+            return 120.0, 0.5, []
+        
+        # Tahminleri oktav eşdeğerliğine göre grupla: BPM'e göre sıralayıp tek
+        # geçişte, küme merkezine (kümenin en küçük BPM'i) %5 tolerans dahilindeki
+        # komşuları aynı kümeye topla
+        bpms = np.array([m[1] for m in normalized], dtype=np.float64)
+        weights = np.array([m[2] for m in normalized], dtype=np.float64)
+        order = np.argsort(bpms, kind="stable")
+        
+        cluster_sums = []  # (sum(w * bpm), sum(w)) her küme için
+        center = None
+        for i in order:
+            if center is None or not bpms[i] - center < 0.05 * center:
+                center = bpms[i]
+                cluster_sums.append([0.0, 0.0])
+            cluster_sums[-1][0] += bpms[i] * weights[i]
+            cluster_sums[-1][1] += weights[i]
+        
+        # En yüksek toplam ağırlığa sahip kümenin ağırlıklı ortalaması
+        sums = np.array(cluster_sums)
+        best = int(np.argmax(sums[:, 1]))
+        if sums[best, 1] > 0:
+            final_bpm = float(sums[best, 0] / sums[best, 1])
         else:
-            # Yedek: hepsinin ağırlıklı ortalaması
-            weighted_sum = sum(bpm * weight for _, bpm, weight, _ in normalized)
-            weight_sum = sum(weight for _, _, weight, _ in normalized)
-            final_bpm = weighted_sum / weight_sum if weight_sum > 0 else 120.0
+            # Tüm ağırlıklar sıfır: ortalama tanımsız, varsayılan tempo
+            # (yöntem ağırlıkları pozitif olduğundan normalde oluşmaz)
+            final_bpm = 120.0
         
         # Round to one decimal
         final_bpm = round(final_bpm, 1)
@@ -342,6 +392,9 @@ class TempoAnalyzer:
     
     def _normalize_to_range(self, bpm: float) -> float:
         """Yarıya indirerek veya ikiye katlayarak BPM'i 60-180 aralığına normalize et."""
+        # Sıfır/negatif tempo (ör. sessiz pencere) katlanarak aralığa giremez
+        if not bpm > 0:
+            return bpm
         while bpm < self.BPM_MIN:
             bpm *= 2
         while bpm > self.BPM_MAX:
@@ -429,14 +482,15 @@ class TempoAnalyzer:
         self, 
         y: np.ndarray, 
         sr: int, 
-        tempo: float
+        tempo: float,
+        beat_env: np.ndarray,
     ) -> list[float]:
         """Bilinen bir tempo öncülü kullanarak vuruşları takip et."""
         try:
             with warnings.catch_warnings():
                 warnings.simplefilter("ignore")
                 _, beat_frames = librosa.beat.beat_track(
-                    y=y,
+                    onset_envelope=beat_env,
                     sr=sr,
                     hop_length=self.hop_length,
                     bpm=tempo,
@@ -466,38 +520,27 @@ class TempoAnalyzer:
         if len(beat_times) < 4:
             return beat_times[:1] if beat_times else []
         
-        # Her vuruşta spektral özellikleri hesapla
-        beat_strengths = []
-        
-        for t in beat_times:
-            # Vuruş etrafındaki örnekleri al
-            center_sample = int(t * sr)
-            window = int(0.05 * sr)  # 50ms window
-            start = max(0, center_sample - window)
-            end = min(len(y), center_sample + window)
-            
-            if end > start:
-                segment = y[start:end]
-                # Vuruş gücü olarak RMS kullan
-                strength = np.sqrt(np.mean(segment ** 2))
-                beat_strengths.append(strength)
-            else:
-                beat_strengths.append(0.0)
-        
-        beat_strengths = np.array(beat_strengths)
+        # Her vuruşta spektral özellikleri hesapla: vuruş etrafındaki ±50 ms
+        # pencerelerin RMS'i (vuruş gücü), tüm vuruşlar için tek seferde
+        window = int(0.05 * sr)  # 50ms window
+        centers = (np.asarray(beat_times) * sr).astype(np.int64)
+        starts = np.maximum(0, centers - window)
+        ends = np.minimum(len(y), centers + window)
+        counts = np.maximum(ends - starts, 0)
+        
+        # Sinyal sınırlarında kırpılan pencereler maske ile kısaltılır
+        idx = starts[:, None] + np.arange(2 * window)
+        valid = idx < ends[:, None]
+        segments = y[np.minimum(idx, len(y) - 1)]
+        energy = np.sum(np.where(valid, segments * segments, 0), axis=1)
+        beat_strengths = np.where(
+            counts > 0, np.sqrt(energy / np.maximum(counts, 1)), 0.0,
+        )
         
         # Bir desen bulmaya çalış (her 3., 4. vb.)
-        best_phase = 0
-        best_score = -1
         meter = 4  # Varsayılan olarak 4/4 varsay
-        
-        for phase in range(meter):
-            downbeat_indices = list(range(phase, len(beat_strengths), meter))
-            if downbeat_indices:
-                score = np.mean(beat_strengths[downbeat_indices])
-                if score > best_score:
-                    best_score = score
-                    best_phase = phase
+        phase_scores = [np.mean(beat_strengths[phase::meter]) for phase in range(meter)]
+        best_phase = int(np.argmax(phase_scores))
         
         # Güçlü vuruşları çıkar
         downbeat_indices = list(range(best_phase, len(beat_times), meter))
@@ -510,8 +553,14 @@ class TempoAnalyzer:
         y: np.ndarray, 
         sr: int,
         global_tempo: float,
+        beat_env: np.ndarray,
     ) -> list[TempoSegment]:
-        """Parça boyunca tempo değişikliklerini algıla."""
+        """
+        Parça boyunca tempo değişikliklerini algıla.
+        
+        Pencereler, her pencere için STFT'yi yeniden hesaplamak yerine
+        parçanın (medyan) başlangıç zarfından dilimlenir.
+        """
         duration = len(y) / sr
         
         # Kısa parçalar için sabit tempo varsay
@@ -526,6 +575,7 @@ class TempoAnalyzer:
         # Pencerelerde tempoyu analiz et
         window_sec = 10.0
         hop_sec = 5.0
+        frames_per_sec = sr / self.hop_length
         
         segments = []
         t = 0.0
@@ -539,13 +589,14 @@ class TempoAnalyzer:
             if end_sample > len(y):
                 break
             
-            window_audio = y[start_sample:end_sample]
+            f_start = int(t * frames_per_sec)
+            f_end = int((t + window_sec) * frames_per_sec)
             
             # Bu pencere için tempoyu tahmin et
             with warnings.catch_warnings():
                 warnings.simplefilter("ignore")
                 tempo, _ = librosa.beat.beat_track(
-                    y=window_audio, 
+                    onset_envelope=beat_env[f_start:f_end], 
                     sr=sr,
                     hop_length=self.hop_length,
                 )
@@ -553,6 +604,10 @@ class TempoAnalyzer:
             if isinstance(tempo, np.ndarray):
                 tempo = float(tempo[0]) if len(tempo) > 0 else global_tempo
             
+            # Sessiz pencerelerde beat_track 0 döndürür
+            if not tempo > 0:
+                tempo = global_tempo
+            
             # Global tempo ile aynı oktava normalize et
             tempo = self._normalize_to_range(tempo)
             
@@ -10,6 +10,7 @@ import sys
 import tempfile
 import shutil
 import re
+import time
 from pathlib import Path
 from typing import Optional, Callable
 from dataclasses import dataclass
@@ -40,6 +41,12 @@ class YouTubeDownloader:
     En iyi ses kalitesi çıkarımı için yt-dlp kullanır.
     """
     
+    # İlerleme geri çağırmaları arasındaki minimum süre (saniye)
+    PROGRESS_INTERVAL = 0.1
+    
+    # yt-dlp okuma tamponu (bayt) - daha az okuma/ilerleme çağrısı
+    BUFFER_SIZE = 1 << 20
+    
     def __init__(self, output_dir: Optional[Path] = None):
         """
         İndiriciyi başlat.
@@ -59,6 +66,7 @@ class YouTubeDownloader:
         
         self._current_progress = 0.0
         self._progress_callback: Optional[Callable[[float, str], None]] = None
+        self._last_progress_time = 0.0
     
     @staticmethod
     def is_available() -> bool:
@@ -134,6 +142,7 @@ class YouTubeDownloader:
             
         self._progress_callback = progress_callback
         self._current_progress = 0.0
+        self._last_progress_time = 0.0
         
         # Benzersiz dosya adı oluştur
         import uuid
@@ -154,6 +163,7 @@ class YouTubeDownloader:
             'progress_hooks': [self._progress_hook],
             'socket_timeout': 15, # 15 saniye timeout (donmayı önlemek için)
             'retries': 3,
+            'buffersize': self.BUFFER_SIZE,
             'http_headers': {
                 'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
                 'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8',
@@ -308,6 +318,13 @@ class YouTubeDownloader:
             
             self._current_progress = 0.1 + progress * 0.8
             
+            # yt-dlp her okunan blokta çağırır; arayüzü gereksiz yere meşgul
+            # etmemek için geri çağırmayı seyrelt
+            now = time.monotonic()
+            if now - self._last_progress_time < self.PROGRESS_INTERVAL:
+                return
+            self._last_progress_time = now
+            
             if self._progress_callback:
                 percent = d.get('_percent_str', '?%').strip()
                 status = f"İndiriliyor... {percent}"
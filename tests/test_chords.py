@@ -0,0 +1,113 @@
+"""
+Tests for chord analysis module.
+"""
+
+import librosa
+import numpy as np
+import pytest
+
+from meloniq.analysis.chords import ChordAnalyzer, beat_times_to_frames
+
+
+class TestChordAnalyzer:
+    """Test cases for ChordAnalyzer."""
+
+    @pytest.fixture
+    def analyzer(self):
+        """Create analyzer instance."""
+        return ChordAnalyzer()
+
+    @pytest.fixture
+    def c_f_g_c_progression(self):
+        """Create a C-F-G-C progression of root-position triads, 2 seconds each."""
+        sr = 22050
+        chord_duration = 2.0
+
+        triads = {
+            "C": [261.63, 329.63, 392.00],  # C4-E4-G4
+            "F": [349.23, 440.00, 523.25],  # F4-A4-C5
+            "G": [392.00, 493.88, 587.33],  # G4-B4-D5
+        }
+        progression = ["C", "F", "G", "C"]
+
+        t = np.arange(int(sr * chord_duration)) / sr
+        y = np.concatenate([
+            sum(np.sin(2 * np.pi * freq * t) for freq in triads[chord])
+            for chord in progression
+        ])
+        y = y / np.max(np.abs(y)) * 0.8
+
+        return y.astype(np.float32), sr, progression, chord_duration
+
+    def _assert_progression(self, result, progression, chord_duration, tolerance):
+        """Check chord labels and change points against the known progression."""
+        assert result.enabled
+        assert [s.chord for s in result.segments] == progression
+
+        for i, segment in enumerate(result.segments):
+            assert segment.start == pytest.approx(i * chord_duration, abs=tolerance)
+            assert segment.end == pytest.approx((i + 1) * chord_duration, abs=tolerance)
+            assert segment.confidence >= ChordAnalyzer.MIN_CONFIDENCE
+
+    def test_progression_with_beats(self, analyzer, c_f_g_c_progression):
+        """Test labels and boundaries when beat times are given."""
+        y, sr, progression, chord_duration = c_f_g_c_progression
+        beat_times = list(np.arange(0, len(y) / sr + 1e-6, 0.5))
+
+        result = analyzer.analyze(y, sr, beat_times=beat_times)
+
+        # Chord changes fall on beats, so boundaries are exact up to frame rounding
+        self._assert_progression(result, progression, chord_duration, tolerance=0.05)
+
+    def test_progression_without_beats(self, analyzer, c_f_g_c_progression):
+        """Test the virtual-beat grid used when no beats are available."""
+        y, sr, progression, chord_duration = c_f_g_c_progression
+
+        result = analyzer.analyze(y, sr)
+
+        # Boundaries snap to the virtual-beat grid
+        tolerance = analyzer.VIRTUAL_BEAT_SEC
+        self._assert_progression(result, progression, chord_duration, tolerance=tolerance)
+
+    def test_injected_features_match_computed(self, analyzer, c_f_g_c_progression):
+        """Test that passing precomputed chroma and beat frames gives the same result."""
+        y, sr, _, _ = c_f_g_c_progression
+        beat_times = list(np.arange(0, len(y) / sr + 1e-6, 0.5))
+
+        computed = analyzer.analyze(y, sr, beat_times=beat_times)
+        injected = analyzer.analyze(
+            y, sr,
+            beat_times=beat_times,
+            chroma=analyzer._compute_chroma(y, sr),
+            beat_frames=beat_times_to_frames(beat_times, sr, analyzer.hop_length),
+        )
+
+        assert injected.segments == computed.segments
+
+    def test_beat_frames_match_librosa(self):
+        """Test that the beat frame conversion rounds like librosa.time_to_frames."""
+        sr = 22050
+        beat_times = np.random.default_rng(0).uniform(0, 300, 500)
+
+        expected = librosa.time_to_frames(beat_times, sr=sr, hop_length=512)
+
+        np.testing.assert_array_equal(beat_times_to_frames(beat_times, sr, 512), expected)
+
+    def test_silence_has_no_chords(self, analyzer):
+        """Test that silent audio yields no chord segments."""
+        sr = 22050
+        y = np.zeros(sr * 4, dtype=np.float32)
+
+        result = analyzer.analyze(y, sr)
+
+        assert result.enabled
+        assert result.segments == []
+
+    def test_disabled(self, analyzer):
+        """Test that disabled detection returns an empty, disabled result."""
+        y = np.zeros(22050, dtype=np.float32)
+
+        result = analyzer.analyze(y, 22050, enabled=False)
+
+        assert not result.enabled
+        assert result.segments == []
@@ -0,0 +1,40 @@
+"""
+Tests that numba-compiled analysis modules load in frozen (PyInstaller) builds.
+"""
+
+import importlib
+import sys
+import types
+from pathlib import Path
+
+import pytest
+
+import meloniq.analysis._jit as jit
+
+ANALYSIS_DIR = Path(jit.__file__).parent
+
+
+@pytest.mark.parametrize("module_name", ["chords", "key", "loudness", "meter", "structure"])
+def test_module_loads_without_source_file(module_name, monkeypatch):
+    """Test that a module compiled from a missing source path imports with caching off."""
+    # Frozen builds turn the disk cache off and load modules without the .py file
+    monkeypatch.setattr(jit, "JIT_CACHE", False)
+
+    source = (ANALYSIS_DIR / f"{module_name}.py").read_text(encoding="utf-8")
+    module = types.ModuleType(f"meloniq.analysis._frozen_{module_name}")
+    module.__package__ = "meloniq.analysis"
+
+    code = compile(source, f"/nonexistent/{module_name}.py", "exec")
+    exec(code, module.__dict__)
+
+
+def test_cache_disabled_when_frozen(monkeypatch):
+    """Test that the numba disk cache is on from source and off in frozen builds."""
+    try:
+        assert importlib.reload(jit).JIT_CACHE
+
+        monkeypatch.setattr(sys, "frozen", True, raising=False)
+        assert not importlib.reload(jit).JIT_CACHE
+    finally:
+        monkeypatch.undo()
+        importlib.reload(jit)
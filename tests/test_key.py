@@ -118,6 +118,17 @@ class TestKeyAnalyzer:
         assert result.explanation
         assert len(result.explanation) > 10
 
+    def test_repeated_analysis_is_cached(self, analyzer, c_major_chord):
+        """Test that re-analyzing the same audio returns an equal, independent result."""
+        y, sr, _ = c_major_chord
+        first = analyzer.analyze(y, sr)
+        first.global_key = "modified"
+
+        second = analyzer.analyze(y.copy(), sr)
+
+        assert second.global_key != "modified"
+        assert len(analyzer._result_cache) == 1
+
 
 class TestKeyAnalyzerEdgeCases:
     """Edge case tests for KeyAnalyzer."""
@@ -0,0 +1,169 @@
+"""
+Tests for the analysis pipeline (caching and result bookkeeping).
+"""
+
+import pickle
+import shutil
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pytest
+import soundfile as sf
+
+from meloniq.analysis import pipeline as pipeline_module
+from meloniq.analysis.pipeline import AnalysisPipeline, AnalysisOptions
+
+
+def _write_click_track(path, sr=22050, duration=3.0, bpm=120, freq=440.0):
+    """Write a short mono WAV: a tone with clicks on the beat."""
+    t = np.arange(int(sr * duration)) / sr
+    y = 0.2 * np.sin(2 * np.pi * freq * t)
+
+    click_length = int(0.01 * sr)
+    for beat in np.arange(0, duration, 60 / bpm):
+        start = int(beat * sr)
+        y[start:start + click_length] += np.exp(-np.linspace(0, 5, click_length))
+
+    sf.write(path, (y / np.max(np.abs(y)) * 0.8).astype(np.float32), sr)
+    return path
+
+
+@pytest.fixture
+def audio_file(tmp_path):
+    """Create a short test audio file."""
+    return _write_click_track(tmp_path / "a.wav")
+
+
+@pytest.fixture
+def cache_dir(tmp_path):
+    """Create an empty cache directory."""
+    path = tmp_path / "cache"
+    path.mkdir()
+    return path
+
+
+class TestAnalysisCache:
+    """Test cases for the on-disk analysis cache."""
+
+    def test_copied_file_reports_its_own_path(self, audio_file, cache_dir):
+        """Test that a cache hit for a copied file keeps the requested file's name."""
+        pipeline = AnalysisPipeline(AnalysisOptions(cache_dir=cache_dir))
+        original = pipeline.analyze(audio_file)
+
+        copy = audio_file.with_name("b_copy.wav")
+        shutil.copy2(audio_file, copy)
+
+        # Fresh pipeline: the result must come from the disk cache
+        cached = AnalysisPipeline(AnalysisOptions(cache_dir=cache_dir)).analyze(copy)
+
+        assert cached.track.filename == "b_copy.wav"
+        assert cached.track.path == str(copy.absolute())
+        assert cached.tempo.global_bpm == original.tempo.global_bpm
+        assert original.track.filename == "a.wav"
+
+    def test_json_is_default_format(self, cache_dir):
+        """Test that the disk cache defaults to data-only gzip JSON."""
+        pipeline = AnalysisPipeline(AnalysisOptions(cache_dir=cache_dir))
+
+        assert not pipeline.options.pickle_cache
+
+    @pytest.mark.parametrize("pickle_cache, suffix", [(False, ".json.gz"), (True, ".pkl")])
+    def test_disk_round_trip(self, audio_file, cache_dir, pickle_cache, suffix):
+        """Test that a saved result loads back unchanged in both formats."""
+        options = AnalysisOptions(cache_dir=cache_dir, pickle_cache=pickle_cache)
+        result = AnalysisPipeline(options).analyze(audio_file)
+
+        cache_files = list(cache_dir.iterdir())
+        assert len(cache_files) == 1
+        assert cache_files[0].name.endswith(suffix)
+
+        # Fresh pipeline: nothing in memory, load from disk
+        loaded = AnalysisPipeline(options)._load_from_cache(audio_file)
+
+        assert loaded is not None
+        assert loaded.model_dump() == result.model_dump()
+
+    def test_stale_pickle_version_is_removed(self, audio_file, cache_dir):
+        """Test that a pickle entry with an old format version is discarded."""
+        options = AnalysisOptions(cache_dir=cache_dir, pickle_cache=True)
+        pipeline = AnalysisPipeline(options)
+        result = pipeline.analyze(audio_file)
+
+        cache_path = pipeline._get_cache_path(audio_file)
+        with open(cache_path, "wb") as f:
+            pickle.dump((AnalysisPipeline.CACHE_FORMAT_VERSION - 1, result), f)
+
+        assert AnalysisPipeline(options)._load_from_cache(audio_file) is None
+        assert not cache_path.exists()
+
+    def test_corrupt_json_entry_is_removed(self, audio_file, cache_dir):
+        """Test that an unreadable JSON entry is discarded."""
+        pipeline = AnalysisPipeline(AnalysisOptions(cache_dir=cache_dir))
+        pipeline.analyze(audio_file)
+
+        cache_path = pipeline._get_cache_path(audio_file)
+        cache_path.write_bytes(b"not gzip")
+
+        fresh = AnalysisPipeline(AnalysisOptions(cache_dir=cache_dir))
+        assert fresh._load_from_cache(audio_file) is None
+        assert not cache_path.exists()
+
+
+class TestShortClips:
+    """Test cases for clips too short for some analyses."""
+
+    def test_short_clip_chords_enabled_without_segments(self, audio_file, cache_dir):
+        """Test that requested chord detection on a short clip stays enabled but empty."""
+        options = AnalysisOptions(cache_dir=cache_dir, use_cache=False, detect_chords=True)
+
+        result = AnalysisPipeline(options).analyze(audio_file)
+
+        assert result.chords.enabled
+        assert result.chords.segments == []
+        assert "too short" in result.chords.warning
+
+
+class TestAnalyzeBatch:
+    """Test cases for multi-file batch analysis."""
+
+    def test_results_in_input_order(self, tmp_path, cache_dir):
+        """Test that a two-file batch returns results in order with the right filenames."""
+        paths = [
+            _write_click_track(tmp_path / "first.wav", bpm=120),
+            _write_click_track(tmp_path / "second.wav", bpm=90, freq=330.0),
+        ]
+        progress = []
+
+        pipeline = AnalysisPipeline(AnalysisOptions(cache_dir=cache_dir))
+        results = pipeline.analyze_batch(
+            paths,
+            max_workers=2,
+            progress_callback=lambda name, ratio: progress.append((name, ratio)),
+        )
+
+        assert [r.track.filename for r in results] == ["first.wav", "second.wav"]
+        assert [r.track.path for r in results] == [str(p.absolute()) for p in paths]
+        assert sorted(name for name, _ in progress) == ["first.wav", "second.wav"]
+        assert progress[-1][1] == 1.0
+
+        # Worker results are cached for the calling pipeline
+        assert pipeline.analyze(paths[1]).track.filename == "second.wav"
+
+    def test_default_workers_are_capped(self, tmp_path, cache_dir, monkeypatch):
+        """Test that the default worker count is capped on many-core machines."""
+        used_workers = []
+
+        class RecordingExecutor(ProcessPoolExecutor):
+            def __init__(self, max_workers=None, **kwargs):
+                used_workers.append(max_workers)
+                super().__init__(max_workers=max_workers, **kwargs)
+
+        monkeypatch.setattr(pipeline_module, "ProcessPoolExecutor", RecordingExecutor)
+        monkeypatch.setattr(pipeline_module.os, "cpu_count", lambda: 64)
+        monkeypatch.setattr(AnalysisPipeline, "BATCH_MAX_WORKERS", 1)
+
+        paths = [_write_click_track(tmp_path / f"{i}.wav") for i in range(2)]
+        AnalysisPipeline(AnalysisOptions(cache_dir=cache_dir)).analyze_batch(paths)
+
+        # BATCH_MAX_WORKERS wins over the CPU count
+        assert used_workers == [1]
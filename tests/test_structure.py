@@ -0,0 +1,94 @@
+"""
+Tests for structure analysis module.
+"""
+
+import librosa
+import numpy as np
+import pytest
+from scipy.signal import find_peaks
+
+from meloniq.analysis.structure import StructureAnalyzer
+
+
+class TestStructureAnalyzer:
+    """Test cases for StructureAnalyzer."""
+
+    @pytest.fixture
+    def analyzer(self):
+        """Create analyzer instance."""
+        return StructureAnalyzer()
+
+    @pytest.fixture
+    def aba_sections(self):
+        """Create an A/B/A signal (15 s each) with boundaries at 15 s and 30 s."""
+        sr = 22050
+        section_duration = 15
+        rng = np.random.default_rng(0)
+        t = np.arange(sr * section_duration) / sr
+
+        # A: bright C major triad; B: A major triad with strong harmonics and noise
+        section_a = sum(
+            np.sin(2 * np.pi * f * t) + 0.1 * np.sin(2 * np.pi * 3 * f * t)
+            for f in [261.63, 329.63, 392.00]
+        )
+        section_b = sum(
+            np.sin(2 * np.pi * f * t) + 0.5 * np.sin(2 * np.pi * 3 * f * t)
+            for f in [220.00, 277.18, 329.63]
+        )
+        section_b = section_b + 0.3 * rng.standard_normal(len(t))
+
+        y = np.concatenate([section_a, section_b, section_a])
+        y = y / np.max(np.abs(y)) * 0.8
+
+        return y.astype(np.float32), sr, [15.0, 30.0]
+
+    def test_novelty_peaks_on_section_boundaries(self, analyzer, aba_sections):
+        """Test that novelty peaks fall on the known section changes."""
+        y, sr, boundaries = aba_sections
+
+        chroma, mfcc = analyzer._compute_features(y, sr)
+        novelty = analyzer._compute_novelty(analyzer._compute_ssm_features(chroma, mfcc))
+
+        peaks, _ = find_peaks(novelty, height=0.5)
+        peak_times = librosa.frames_to_time(peaks, sr=sr, hop_length=analyzer.hop_length)
+
+        assert len(peak_times) == len(boundaries)
+        np.testing.assert_allclose(peak_times, boundaries, atol=0.5)
+
+    def test_segments_without_beats(self, analyzer, aba_sections):
+        """Test frame-resolution segmentation of the A/B/A signal."""
+        y, sr, boundaries = aba_sections
+
+        result = analyzer.analyze(y, sr)
+
+        starts = [s.start for s in result.segments[1:]]
+        assert len(result.segments) == len(boundaries) + 1
+        np.testing.assert_allclose(starts, boundaries, atol=0.5)
+        assert result.segments[0].start == 0.0
+        assert result.segments[-1].end == pytest.approx(len(y) / sr)
+
+    def test_segments_with_beats(self, analyzer, aba_sections):
+        """Test that beat-synchronous segmentation puts boundaries on beats."""
+        y, sr, boundaries = aba_sections
+        beat_times = list(np.arange(0, len(y) / sr, 0.5))
+
+        result = analyzer.analyze(y, sr, beat_times=beat_times)
+
+        starts = np.array([s.start for s in result.segments[1:]])
+        assert len(result.segments) == len(boundaries) + 1
+        np.testing.assert_allclose(starts, boundaries, atol=0.5)
+
+        # Boundaries are beat positions (up to frame rounding)
+        frame_period = analyzer.hop_length / sr
+        distance_to_beat = np.min(np.abs(starts[:, None] - np.array(beat_times)), axis=1)
+        assert np.all(distance_to_beat <= frame_period)
+
+    def test_short_track_single_segment(self, analyzer):
+        """Test that tracks shorter than MIN_DURATION return a single segment."""
+        sr = 22050
+        y = np.zeros(sr * 10, dtype=np.float32)
+
+        result = analyzer.analyze(y, sr)
+
+        assert len(result.segments) == 1
+        assert result.segments[0].end == pytest.approx(10.0)
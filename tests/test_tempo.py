@@ -159,3 +159,103 @@ class TestTempoAnalyzerEdgeCases:
         assert result is not None
         # Confidence should be lower for noise
         assert result.confidence < 0.9
+    
+    def test_zero_bpm_estimates_in_ensemble(self, analyzer):
+        """Test that zero/NaN tempo estimates (silent input) are ignored by the ensemble."""
+        # Only unusable estimates: default tempo instead of a crash
+        bpm, confidence, candidates = analyzer._ensemble_tempo([
+            ('librosa_beat', 0.0, 0.70),
+            ('plp', 0.0, 0.65),
+            ('acf', float('nan'), 0.60),
+        ])
+        assert bpm == 120.0
+        assert np.isfinite(confidence)
+        assert candidates == []
+        
+        # Mixed with a real estimate: the real estimate wins
+        bpm, confidence, _ = analyzer._ensemble_tempo([
+            ('librosa_beat', 0.0, 0.70),
+            ('plp', 100.0, 0.65),
+        ])
+        assert bpm == 100.0
+        assert np.isfinite(confidence)
+    
+    def test_long_silence_inside_track(self, analyzer):
+        """Test tempo-change detection over silent windows in a long track."""
+        sr = 22050
+        y = np.zeros(sr * 40)
+        
+        # 120 BPM clicks except for a 15 s silent gap
+        click_length = int(0.01 * sr)
+        for t in np.arange(0, 40, 0.5):
+            if 10 <= t < 25:
+                continue
+            start = int(t * sr)
+            y[start:start + click_length] = np.exp(-np.linspace(0, 5, click_length))
+        
+        result = analyzer.analyze(y, sr)
+        
+        assert np.isfinite(result.global_bpm) and result.global_bpm > 0
+        assert all(np.isfinite(s.bpm) and s.bpm > 0 for s in result.segments)
+
+
+class TestDeepRhythmFastPath:
+    """Test the tempogram skip when DeepRhythm and beat_track agree."""
+    
+    class StubPredictor:
+        """Stand-in for DeepRhythmPredictor returning a fixed tempo."""
+        
+        def __init__(self, bpm):
+            self.bpm = bpm
+        
+        def predict(self, y, sr):
+            return self.bpm
+    
+    @pytest.fixture
+    def click_track(self):
+        """Create a 10 second click track at 120 BPM."""
+        sr = 22050
+        y = np.zeros(sr * 10)
+        click_length = int(0.01 * sr)
+        for t in np.arange(0, 10, 0.5):
+            start = int(t * sr)
+            y[start:start + click_length] = np.exp(-np.linspace(0, 5, click_length))
+        return y, sr
+    
+    def _analyze_counting_tempograms(self, y, sr, cnn_bpm):
+        """Analyze with a stubbed predictor; return the number of tempogram calls."""
+        analyzer = TempoAnalyzer()
+        analyzer._predictor = self.StubPredictor(cnn_bpm)
+        
+        calls = []
+        plp, acf = analyzer._tempogram_plp, analyzer._tempogram_acf
+        analyzer._tempogram_plp = lambda *args: calls.append("plp") or plp(*args)
+        analyzer._tempogram_acf = lambda *args: calls.append("acf") or acf(*args)
+        
+        result = analyzer.analyze(y, sr)
+        return result, sorted(calls)
+    
+    def _librosa_bpm(self, y, sr):
+        """Tempo estimated by the librosa beat tracker alone."""
+        analyzer = TempoAnalyzer()
+        _, beat_env = analyzer._onset_envelopes(y, sr)
+        return analyzer._librosa_beat_track(beat_env, sr)[0]
+    
+    def test_agreement_skips_tempograms(self, click_track):
+        """Test that PLP/ACF are skipped when the CNN agrees with beat_track."""
+        y, sr = click_track
+        cnn_bpm = self._librosa_bpm(y, sr)
+        
+        result, calls = self._analyze_counting_tempograms(y, sr, cnn_bpm)
+        
+        assert calls == []
+        assert result.global_bpm == pytest.approx(cnn_bpm, abs=0.1)
+    
+    def test_disagreement_runs_tempograms(self, click_track):
+        """Test that PLP/ACF run when the CNN disagrees with beat_track."""
+        y, sr = click_track
+        cnn_bpm = self._librosa_bpm(y, sr) * 1.3
+        
+        _, calls = self._analyze_counting_tempograms(y, sr, cnn_bpm)
+        
+        assert calls == ["acf", "plp"]